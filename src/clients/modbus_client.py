@@ -3,6 +3,9 @@ Cliente MODBUS para comunicação com hardware.
 """
 import asyncio
 import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union, List
 import os
 
@@ -17,6 +20,26 @@ except ImportError:
     logger.warning("PyModbus não está disponível. Usando modo simulação.")
     PYMODBUS_AVAILABLE = False
 
+# Importação condicional do numpy (geração vetorizada na simulação)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Tamanho das tabelas de valores simulados (potência de 2 para indexar com &)
+_TAMANHO_TABELA_SIM = 1024
+
+# Maior resposta RTU esperada: leitura de 125 holding registers
+# (1 slave + 1 função + 1 contagem + 2*125 dados + 2 CRC)
+_MAX_BYTES_RESPOSTA = 5 + 2 * 125
+
+
+# Pool de conexões seriais compartilhadas por (port, baudrate): as duas
+# cancelas e o placar falam com a mesma porta, então abrir um cliente
+# serial por serviço só paga o custo de open repetidas vezes
+_POOL_CONEXOES: dict = {}  # (port, baudrate) -> [client, refcount]
+
 
 class ModbusClient:
     """Cliente MODBUS para comunicação com dispositivos."""
@@ -25,13 +48,58 @@ class ModbusClient:
         self,
         port: str = "/dev/ttyUSB0",
         baudrate: int = 9600,
-        modo_simulacao: bool = True
+        modo_simulacao: bool = True,
+        sim_latency: float = 0.1,
+        sim_seed: Optional[int] = None
     ):
         self.port = port
         self.baudrate = baudrate
         self.modo_simulacao = modo_simulacao or not PYMODBUS_AVAILABLE
         self.client: Optional[Union[ModbusSerialClient, ModbusTcpClient]] = None
         self.conectado = False
+        # Latência simulada por operação (0 desliga o sleep em testes)
+        self.sim_latency = sim_latency
+
+        # Tabelas pré-computadas de valores simulados: leituras viram
+        # lookups indexados e, com sim_seed fixo, a sequência é
+        # reproduzível entre execuções de teste
+        self.sim_seed = sim_seed
+        if NUMPY_AVAILABLE:
+            rng = np.random.default_rng(sim_seed)
+            self._sim_coils = rng.integers(0, 2, size=_TAMANHO_TABELA_SIM, dtype=np.bool_)
+            self._sim_registers = rng.integers(0, 101, size=_TAMANHO_TABELA_SIM, dtype=np.uint16)
+        else:
+            rng = random.Random(sim_seed)
+            self._sim_coils = [rng.random() < 0.5 for _ in range(_TAMANHO_TABELA_SIM)]
+            self._sim_registers = [rng.randint(0, 100) for _ in range(_TAMANHO_TABELA_SIM)]
+
+        # Leituras pendentes aguardando coalescência ((slave_id, endereco) -> Future)
+        self._coils_pendentes: dict = {}
+        self._registers_pendentes: dict = {}
+        self._flush_agendado = False
+
+        # Serialização das transações RTU: duas corrotinas intercalando bytes
+        # na mesma porta serial causam erros de CRC e retries com timeout
+        self._txn_lock = asyncio.Lock()
+        self._ultimo_tx = 0.0
+        # Executor de thread única: o cliente sync do pymodbus bloqueia na
+        # porta serial, o que travaria o event loop durante a transação
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="modbus-io")
+        # Silêncio mínimo entre frames RTU: 3.5 caracteres de 11 bits
+        self._silencio_entre_frames = 3.5 * 11 / baudrate
+        # Timeout dimensionado pelo tamanho conhecido da resposta (tempo de
+        # transmissão do pior frame + folga de processamento do escravo),
+        # em vez de um valor fixo generoso que mascara escravos mortos
+        self._timeout_resposta = _MAX_BYTES_RESPOSTA * 11 / baudrate + 0.05
+
+        # Protótipo do dicionário de status (campos fixos preenchidos uma vez)
+        self._status_template = {
+            "conectado": False,
+            "modo_simulacao": self.modo_simulacao,
+            "port": self.port,
+            "baudrate": self.baudrate,
+            "pymodbus_disponivel": PYMODBUS_AVAILABLE
+        }
         
         if not self.modo_simulacao and not PYMODBUS_AVAILABLE:
             logger.warning("PyModbus não disponível. Forçando modo simulação.")
@@ -50,29 +118,42 @@ class ModbusClient:
             return True
         
         try:
+            # Reaproveita conexão aberta para a mesma porta, se houver
+            chave = (self.port, self.baudrate)
+            entrada = _POOL_CONEXOES.get(chave)
+            if entrada is not None:
+                self.client = entrada[0]
+                entrada[1] += 1
+                self.conectado = True
+                logger.info(f"Reutilizando conexão MODBUS: {self.port} @ {self.baudrate}")
+                return True
+
             # Verifica se a porta serial existe
             if not os.path.exists(self.port):
                 logger.error(f"Porta serial não encontrada: {self.port}")
                 return False
-            
-            # Cria cliente serial
+
+            # Cria cliente serial (o framer do pymodbus já lê a resposta
+            # pelo tamanho esperado do frame, não byte a byte até estourar
+            # o timeout)
             self.client = ModbusSerialClient(
                 port=self.port,
                 baudrate=self.baudrate,
-                timeout=3
+                timeout=self._timeout_resposta
             )
-            
+
             # Conecta
-            result = self.client.connect()
+            result = await self._executar_bloqueante(self.client.connect)
             self.conectado = result
-            
+
             if self.conectado:
+                _POOL_CONEXOES[chave] = [self.client, 1]
                 logger.info(f"Conectado via MODBUS: {self.port} @ {self.baudrate}")
             else:
                 logger.error("Falha na conexão MODBUS")
-            
+
             return self.conectado
-            
+
         except Exception as e:
             logger.error(f"Erro ao conectar MODBUS: {e}")
             self.conectado = False
@@ -86,8 +167,18 @@ class ModbusClient:
             return
         
         if self.client and self.conectado:
-            self.client.close()
             self.conectado = False
+
+            # Só fecha a porta quando o último usuário do pool sair
+            chave = (self.port, self.baudrate)
+            entrada = _POOL_CONEXOES.get(chave)
+            if entrada is not None:
+                entrada[1] -= 1
+                if entrada[1] > 0:
+                    return
+                del _POOL_CONEXOES[chave]
+
+            await self._executar_bloqueante(self.client.close)
             logger.info("Desconectado do MODBUS")
     
     async def ler_coil(self, endereco: int, slave_id: int = 1) -> Optional[bool]:
@@ -103,25 +194,14 @@ class ModbusClient:
         """
         if self.modo_simulacao:
             return await self._simular_leitura_coil(endereco)
-        
+
         if not self.conectado:
             logger.error("Cliente MODBUS não conectado")
             return None
-        
-        try:
-            result = self.client.read_coils(endereco, 1, slave_id)
-            
-            if result.isError():
-                logger.error(f"Erro ao ler coil {endereco}: {result}")
-                return None
-            
-            valor = result.bits[0]
-            logger.debug(f"Coil {endereco}: {valor}")
-            return valor
-            
-        except Exception as e:
-            logger.error(f"Erro ao ler coil {endereco}: {e}")
-            return None
+
+        valor = await self._agendar_leitura(self._coils_pendentes, endereco, slave_id)
+        logger.debug("Coil %s: %s", endereco, valor)
+        return valor
     
     async def escrever_coil(self, endereco: int, valor: bool, slave_id: int = 1) -> bool:
         """
@@ -143,13 +223,13 @@ class ModbusClient:
             return False
         
         try:
-            result = self.client.write_coil(endereco, valor, slave_id)
-            
+            result = await self._transacao("write_coil", endereco, valor, slave_id)
+
             if result.isError():
                 logger.error(f"Erro ao escrever coil {endereco}: {result}")
                 return False
             
-            logger.debug(f"Coil {endereco} = {valor}")
+            logger.debug("Coil %s = %s", endereco, valor)
             return True
             
         except Exception as e:
@@ -169,25 +249,14 @@ class ModbusClient:
         """
         if self.modo_simulacao:
             return await self._simular_leitura_register(endereco)
-        
+
         if not self.conectado:
             logger.error("Cliente MODBUS não conectado")
             return None
-        
-        try:
-            result = self.client.read_holding_registers(endereco, 1, slave_id)
-            
-            if result.isError():
-                logger.error(f"Erro ao ler register {endereco}: {result}")
-                return None
-            
-            valor = result.registers[0]
-            logger.debug(f"Register {endereco}: {valor}")
-            return valor
-            
-        except Exception as e:
-            logger.error(f"Erro ao ler register {endereco}: {e}")
-            return None
+
+        valor = await self._agendar_leitura(self._registers_pendentes, endereco, slave_id)
+        logger.debug("Register %s: %s", endereco, valor)
+        return valor
     
     async def escrever_holding_register(
         self,
@@ -214,13 +283,13 @@ class ModbusClient:
             return False
         
         try:
-            result = self.client.write_register(endereco, valor, slave_id)
-            
+            result = await self._transacao("write_register", endereco, valor, slave_id)
+
             if result.isError():
                 logger.error(f"Erro ao escrever register {endereco}: {result}")
                 return False
             
-            logger.debug(f"Register {endereco} = {valor}")
+            logger.debug("Register %s = %s", endereco, valor)
             return True
             
         except Exception as e:
@@ -252,67 +321,282 @@ class ModbusClient:
             return None
         
         try:
-            result = self.client.read_coils(endereco_inicial, quantidade, slave_id)
-            
+            result = await self._transacao("read_coils", endereco_inicial, quantidade, slave_id)
+
             if result.isError():
                 logger.error(f"Erro ao ler coils {endereco_inicial}-{endereco_inicial+quantidade-1}: {result}")
                 return None
             
             valores = result.bits[:quantidade]
-            logger.debug(f"Coils {endereco_inicial}-{endereco_inicial+quantidade-1}: {valores}")
+            logger.debug("Coils %s-%s: %s", endereco_inicial, endereco_inicial + quantidade - 1, valores)
             return valores
             
         except Exception as e:
             logger.error(f"Erro ao ler múltiplas coils: {e}")
             return None
     
+    async def ler_multiplas_coils_raw(
+        self,
+        endereco_inicial: int,
+        quantidade: int,
+        slave_id: int = 1
+    ):
+        """
+        Lê múltiplas coils como array booleano numpy.
+
+        Consumidores que varrem o resultado (ex.: localizar sensores
+        ativos com np.flatnonzero) evitam o loop Python sobre a lista de
+        bools. Sem numpy instalado, retorna a lista convencional.
+
+        Args:
+            endereco_inicial: Primeiro endereço
+            quantidade: Número de coils a ler
+            slave_id: ID do dispositivo slave
+
+        Returns:
+            np.ndarray | List[bool]: Valores das coils (None se erro)
+        """
+        valores = await self.ler_multiplas_coils(endereco_inicial, quantidade, slave_id)
+
+        if valores is None or not NUMPY_AVAILABLE:
+            return valores
+
+        return np.asarray(valores[:quantidade], dtype=np.bool_)
+
+    async def _executar_bloqueante(self, func, *args):
+        """Executa uma chamada bloqueante do pymodbus fora do event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, func, *args)
+
+    async def _transacao(self, metodo: str, *args):
+        """
+        Executa uma transação MODBUS com retry e reconexão automática.
+
+        Args:
+            metodo: Nome do método do cliente pymodbus (ex.: "read_coils")
+            *args: Argumentos da chamada
+
+        Returns:
+            Resposta do pymodbus
+
+        Raises:
+            Exception: Última falha, se todas as tentativas esgotarem
+        """
+        ultima_falha = None
+
+        for tentativa in range(3):
+            async with self._txn_lock:
+                await self._aguardar_silencio()
+                try:
+                    return await self._executar_bloqueante(
+                        getattr(self.client, metodo), *args
+                    )
+                except Exception as e:
+                    ultima_falha = e
+                finally:
+                    self._ultimo_tx = time.monotonic()
+
+            logger.warning(
+                f"Falha na transação MODBUS (tentativa {tentativa + 1}/3): {ultima_falha}"
+            )
+            if not await self._reconectar():
+                break
+
+        raise ultima_falha
+
+    async def _reconectar(self) -> bool:
+        """Tenta restabelecer a conexão MODBUS após uma falha."""
+        try:
+            await self._executar_bloqueante(self.client.close)
+        except Exception:
+            pass
+
+        _POOL_CONEXOES.pop((self.port, self.baudrate), None)
+        self.conectado = False
+        return await self.conectar()
+
+    async def _aguardar_silencio(self):
+        """Garante o silêncio mínimo entre frames RTU na porta serial."""
+        espera = self._silencio_entre_frames - (time.monotonic() - self._ultimo_tx)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    # Coalescência de leituras
+    # Leituras de endereços adjacentes feitas dentro da janela abaixo são
+    # agrupadas em uma única transação MODBUS, economizando o overhead de
+    # frame RTU + silêncio entre frames de cada requisição individual.
+    JANELA_COALESCENCIA = 0.002  # segundos
+    GAP_MAXIMO_COILS = 8
+    GAP_MAXIMO_REGISTERS = 1
+
+    async def _agendar_leitura(self, pendentes: dict, endereco: int, slave_id: int):
+        """
+        Registra uma leitura pendente e aguarda o resultado do lote.
+
+        Args:
+            pendentes: Fila de leituras pendentes (coils ou registers)
+            endereco: Endereço a ler
+            slave_id: ID do dispositivo slave
+
+        Returns:
+            Valor lido (None se erro)
+        """
+        loop = asyncio.get_running_loop()
+        chave = (slave_id, endereco)
+
+        future = pendentes.get(chave)
+        if future is None:
+            future = loop.create_future()
+            pendentes[chave] = future
+
+        if not self._flush_agendado:
+            self._flush_agendado = True
+            loop.call_later(self.JANELA_COALESCENCIA, self._disparar_flush, loop)
+
+        return await future
+
+    def _disparar_flush(self, loop):
+        """Dispara a execução das leituras pendentes."""
+        self._flush_agendado = False
+        loop.create_task(self._executar_leituras_pendentes())
+
+    async def _executar_leituras_pendentes(self):
+        """Executa as leituras pendentes agrupadas por faixas contíguas."""
+        coils, self._coils_pendentes = self._coils_pendentes, {}
+        registers, self._registers_pendentes = self._registers_pendentes, {}
+
+        for slave_id, faixa in self._agrupar_faixas(coils, self.GAP_MAXIMO_COILS):
+            await self._ler_faixa_coils(slave_id, faixa)
+
+        for slave_id, faixa in self._agrupar_faixas(registers, self.GAP_MAXIMO_REGISTERS):
+            await self._ler_faixa_registers(slave_id, faixa)
+
+    @staticmethod
+    def _agrupar_faixas(pendentes: dict, gap_maximo: int) -> list:
+        """
+        Agrupa endereços pendentes em faixas contíguas por slave.
+
+        Args:
+            pendentes: Leituras pendentes ((slave_id, endereco) -> Future)
+            gap_maximo: Distância máxima entre endereços do mesmo lote
+
+        Returns:
+            list: Pares (slave_id, [(endereco, future), ...]) ordenados
+        """
+        por_slave: dict = {}
+        for (slave_id, endereco), future in pendentes.items():
+            por_slave.setdefault(slave_id, []).append((endereco, future))
+
+        faixas = []
+        for slave_id, itens in por_slave.items():
+            itens.sort(key=lambda item: item[0])
+            faixa = [itens[0]]
+            for item in itens[1:]:
+                if item[0] - faixa[-1][0] <= gap_maximo:
+                    faixa.append(item)
+                else:
+                    faixas.append((slave_id, faixa))
+                    faixa = [item]
+            faixas.append((slave_id, faixa))
+        return faixas
+
+    async def _ler_faixa_coils(self, slave_id: int, faixa: list):
+        """Lê uma faixa contígua de coils e distribui os resultados."""
+        inicio = faixa[0][0]
+        quantidade = faixa[-1][0] - inicio + 1
+        bits = None
+
+        try:
+            result = await self._transacao("read_coils", inicio, quantidade, slave_id)
+
+            if result.isError():
+                logger.error(f"Erro ao ler coils {inicio}-{inicio+quantidade-1}: {result}")
+            else:
+                bits = result.bits
+
+        except Exception as e:
+            logger.error(f"Erro ao ler coils {inicio}-{inicio+quantidade-1}: {e}")
+
+        for endereco, future in faixa:
+            if not future.done():
+                future.set_result(bits[endereco - inicio] if bits is not None else None)
+
+    async def _ler_faixa_registers(self, slave_id: int, faixa: list):
+        """Lê uma faixa contígua de registers e distribui os resultados."""
+        inicio = faixa[0][0]
+        quantidade = faixa[-1][0] - inicio + 1
+        valores = None
+
+        try:
+            result = await self._transacao("read_holding_registers", inicio, quantidade, slave_id)
+
+            if result.isError():
+                logger.error(f"Erro ao ler registers {inicio}-{inicio+quantidade-1}: {result}")
+            else:
+                valores = result.registers
+
+        except Exception as e:
+            logger.error(f"Erro ao ler registers {inicio}-{inicio+quantidade-1}: {e}")
+
+        for endereco, future in faixa:
+            if not future.done():
+                future.set_result(valores[endereco - inicio] if valores is not None else None)
+
     # Métodos de simulação
+    async def _aguardar_latencia_simulada(self):
+        """Aplica a latência configurada para operações simuladas."""
+        if self.sim_latency:
+            await asyncio.sleep(self.sim_latency)
+
     async def _simular_leitura_coil(self, endereco: int) -> bool:
         """Simula leitura de coil."""
-        import random
-        await asyncio.sleep(0.1)
-        valor = random.choice([True, False])
-        logger.debug(f"[SIM] Coil {endereco}: {valor}")
+        await self._aguardar_latencia_simulada()
+        valor = bool(self._sim_coils[endereco & (_TAMANHO_TABELA_SIM - 1)])
+        logger.debug("[SIM] Coil %s: %s", endereco, valor)
         return valor
-    
+
     async def _simular_escrita_coil(self, endereco: int, valor: bool) -> bool:
         """Simula escrita de coil."""
-        await asyncio.sleep(0.1)
-        logger.debug(f"[SIM] Escrevendo coil {endereco} = {valor}")
+        await self._aguardar_latencia_simulada()
+        logger.debug("[SIM] Escrevendo coil %s = %s", endereco, valor)
         return True
-    
+
     async def _simular_leitura_register(self, endereco: int) -> int:
         """Simula leitura de register."""
-        import random
-        await asyncio.sleep(0.1)
-        valor = random.randint(0, 100)
-        logger.debug(f"[SIM] Register {endereco}: {valor}")
+        await self._aguardar_latencia_simulada()
+        valor = int(self._sim_registers[endereco & (_TAMANHO_TABELA_SIM - 1)])
+        logger.debug("[SIM] Register %s: %s", endereco, valor)
         return valor
-    
+
     async def _simular_escrita_register(self, endereco: int, valor: int) -> bool:
         """Simula escrita de register."""
-        await asyncio.sleep(0.1)
-        logger.debug(f"[SIM] Escrevendo register {endereco} = {valor}")
+        await self._aguardar_latencia_simulada()
+        logger.debug("[SIM] Escrevendo register %s = %s", endereco, valor)
         return True
-    
+
     async def _simular_leitura_multiplas_coils(
         self,
         endereco_inicial: int,
         quantidade: int
     ) -> List[bool]:
         """Simula leitura de múltiplas coils."""
-        import random
-        await asyncio.sleep(0.1)
-        valores = [random.choice([True, False]) for _ in range(quantidade)]
-        logger.debug(f"[SIM] Coils {endereco_inicial}-{endereco_inicial+quantidade-1}: {valores}")
+        await self._aguardar_latencia_simulada()
+        mascara = _TAMANHO_TABELA_SIM - 1
+        if NUMPY_AVAILABLE:
+            # Fatia vetorizada da tabela, com wraparound nos endereços
+            indices = np.arange(endereco_inicial, endereco_inicial + quantidade) & mascara
+            valores = self._sim_coils[indices].tolist()
+        else:
+            valores = [
+                bool(self._sim_coils[(endereco_inicial + i) & mascara])
+                for i in range(quantidade)
+            ]
+        logger.debug("[SIM] Coils %s-%s: %s", endereco_inicial, endereco_inicial + quantidade - 1, valores)
         return valores
     
     def obter_status(self) -> dict:
         """Retorna o status da conexão."""
-        return {
-            "conectado": self.conectado,
-            "modo_simulacao": self.modo_simulacao,
-            "port": self.port,
-            "baudrate": self.baudrate,
-            "pymodbus_disponivel": PYMODBUS_AVAILABLE
-        }
+        template = self._status_template
+        template["conectado"] = self.conectado
+        template["modo_simulacao"] = self.modo_simulacao
+        return template.copy()
@@ -1,9 +1,25 @@
 """
 Modelo de dados para eventos do sistema de estacionamento.
 """
+import json
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Optional, Union
+
+# Importação condicional do ciso8601 (parser ISO-8601 em C)
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    _parse_iso = datetime.fromisoformat
+
+# Importação condicional do msgspec (codecs JSON em C para o caminho quente)
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+    _JSON_ENCODER = msgspec.json.Encoder()
+    _JSON_DECODER = msgspec.json.Decoder()
+except ImportError:
+    MSGSPEC_AVAILABLE = False
 
 
 class TipoEvento(Enum):
@@ -20,14 +36,26 @@ class StatusEvento(Enum):
     ERRO = "erro"
 
 
+# Lookups reversos pré-computados: dict lookup é bem mais barato que
+# Enum.__call__ no caminho quente de desserialização
+_TIPO_POR_VALOR = {membro.value: membro for membro in TipoEvento}
+_STATUS_POR_VALOR = {membro.value: membro for membro in StatusEvento}
+
+
 class Evento:
     """Modelo de evento do sistema."""
-    
+
+    __slots__ = (
+        "id", "placa", "tipo", "_timestamp", "_timestamp_iso", "confianca_lpr",
+        "andar", "status", "valor_calculado", "tempo_permanencia_minutos",
+        "erro_descricao"
+    )
+
     def __init__(
         self,
         placa: str,
         tipo: TipoEvento,
-        timestamp: datetime,
+        timestamp: Union[datetime, str],
         confianca_lpr: float,
         andar: str = "terreo",
         status: StatusEvento = StatusEvento.PENDENTE,
@@ -39,21 +67,42 @@ class Evento:
         self.id = id
         self.placa = placa
         self.tipo = tipo
-        self.timestamp = timestamp
+        # Aceita a string ISO crua vinda da rede: o parse para datetime só
+        # acontece se alguém realmente precisar do objeto
+        if isinstance(timestamp, str):
+            self._timestamp = None
+            self._timestamp_iso = timestamp
+        else:
+            self._timestamp = timestamp
+            self._timestamp_iso = None
         self.confianca_lpr = confianca_lpr
         self.andar = andar
         self.status = status
         self.valor_calculado = valor_calculado
         self.tempo_permanencia_minutos = tempo_permanencia_minutos
         self.erro_descricao = erro_descricao
-    
+
+    @property
+    def timestamp(self) -> datetime:
+        """Timestamp do evento (parse preguiçoso da string ISO)."""
+        if self._timestamp is None:
+            self._timestamp = _parse_iso(self._timestamp_iso)
+        return self._timestamp
+
+    @property
+    def timestamp_iso(self) -> str:
+        """Timestamp do evento em formato ISO (sem round-trip de parse)."""
+        if self._timestamp_iso is None:
+            self._timestamp_iso = self._timestamp.isoformat()
+        return self._timestamp_iso
+
     def to_dict(self) -> dict:
         """Converte o evento para dicionário."""
         return {
             "id": self.id,
             "placa": self.placa,
             "tipo": self.tipo.value,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp_iso,
             "confianca_lpr": self.confianca_lpr,
             "andar": self.andar,
             "status": self.status.value,
@@ -62,17 +111,30 @@ class Evento:
             "erro_descricao": self.erro_descricao
         }
     
+    def to_json(self) -> bytes:
+        """Serializa o evento para JSON em bytes."""
+        if MSGSPEC_AVAILABLE:
+            return _JSON_ENCODER.encode(self.to_dict())
+        return json.dumps(self.to_dict()).encode('utf-8')
+
+    @classmethod
+    def from_json(cls, dados: bytes) -> 'Evento':
+        """Cria um evento a partir de JSON em bytes."""
+        if MSGSPEC_AVAILABLE:
+            return cls.from_dict(_JSON_DECODER.decode(dados))
+        return cls.from_dict(json.loads(dados))
+
     @classmethod
     def from_dict(cls, data: dict) -> 'Evento':
         """Cria um evento a partir de um dicionário."""
         return cls(
             id=data.get("id"),
             placa=data["placa"],
-            tipo=TipoEvento(data["tipo"]),
-            timestamp=datetime.fromisoformat(data["timestamp"]),
+            tipo=_TIPO_POR_VALOR[data["tipo"]],
+            timestamp=data["timestamp"],
             confianca_lpr=data["confianca_lpr"],
             andar=data.get("andar", "terreo"),
-            status=StatusEvento(data.get("status", "pendente")),
+            status=_STATUS_POR_VALOR[data.get("status", "pendente")],
             valor_calculado=data.get("valor_calculado"),
             tempo_permanencia_minutos=data.get("tempo_permanencia_minutos"),
             erro_descricao=data.get("erro_descricao")
@@ -81,7 +143,9 @@ class Evento:
 
 class EventoResposta:
     """Resposta do servidor central para um evento."""
-    
+
+    __slots__ = ("evento_id", "sucesso", "acao", "valor", "tempo_permanencia", "mensagem")
+
     def __init__(
         self,
         evento_id: str,
@@ -108,3 +172,9 @@ class EventoResposta:
             "tempo_permanencia": self.tempo_permanencia,
             "mensagem": self.mensagem
         }
+
+    def to_json(self) -> bytes:
+        """Serializa a resposta para JSON em bytes."""
+        if MSGSPEC_AVAILABLE:
+            return _JSON_ENCODER.encode(self.dict())
+        return json.dumps(self.dict()).encode('utf-8')
@@ -1,9 +1,16 @@
 """
 Modelo de dados para veículos no estacionamento.
 """
+import functools
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Optional, Union
+
+# Importação condicional do ciso8601 (parser ISO-8601 em C)
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    _parse_iso = datetime.fromisoformat
 
 
 class StatusVeiculo(Enum):
@@ -12,41 +19,109 @@ class StatusVeiculo(Enum):
     BLOQUEADO = "bloqueado"
 
 
+# Lookup reverso pré-computado (evita Enum.__call__ na desserialização)
+_STATUS_POR_VALOR = {membro.value: membro for membro in StatusVeiculo}
+
+
+@functools.lru_cache(maxsize=4096)
+def _calcular_valor_centavos(minutos: int, preco_centavos: int, minimo_centavos: int) -> int:
+    """Calcula o valor cobrado em centavos (cacheado: os tempos de
+    permanência se repetem muito entre clientes de curta duração)."""
+    valor = minutos * preco_centavos
+    return valor if valor >= minimo_centavos else minimo_centavos
+
+
 class Veiculo:
     """Representa um veículo no sistema de estacionamento."""
-    
+
+    __slots__ = (
+        "placa", "_timestamp_entrada", "_timestamp_entrada_iso",
+        "_timestamp_saida", "_timestamp_saida_iso", "andar",
+        "vaga", "status", "valor_calculado", "tempo_permanencia_minutos"
+    )
+
     def __init__(
         self,
         placa: str,
-        timestamp_entrada: datetime,
+        timestamp_entrada: Union[datetime, str],
         andar: str = "terreo",
         vaga: Optional[int] = None
     ):
         self.placa = placa
-        self.timestamp_entrada = timestamp_entrada
-        self.timestamp_saida: Optional[datetime] = None
+        # Aceita a string ISO crua: o parse para datetime é preguiçoso e a
+        # string original é reaproveitada na persistência sem round-trip
+        if isinstance(timestamp_entrada, str):
+            self._timestamp_entrada = None
+            self._timestamp_entrada_iso = timestamp_entrada
+        else:
+            self._timestamp_entrada = timestamp_entrada
+            self._timestamp_entrada_iso = None
+        self._timestamp_saida: Optional[datetime] = None
+        self._timestamp_saida_iso: Optional[str] = None
         self.andar = andar
         self.vaga = vaga
         self.status = StatusVeiculo.ESTACIONADO
         self.valor_calculado: Optional[float] = None
         self.tempo_permanencia_minutos: Optional[int] = None
-    
+
+    @property
+    def timestamp_entrada(self) -> datetime:
+        """Timestamp de entrada (parse preguiçoso da string ISO)."""
+        if self._timestamp_entrada is None:
+            self._timestamp_entrada = _parse_iso(self._timestamp_entrada_iso)
+        return self._timestamp_entrada
+
+    @property
+    def timestamp_entrada_iso(self) -> str:
+        """Timestamp de entrada em formato ISO."""
+        if self._timestamp_entrada_iso is None:
+            self._timestamp_entrada_iso = self._timestamp_entrada.isoformat()
+        return self._timestamp_entrada_iso
+
+    @property
+    def timestamp_saida(self) -> Optional[datetime]:
+        """Timestamp de saída (parse preguiçoso da string ISO)."""
+        if self._timestamp_saida is None and self._timestamp_saida_iso is not None:
+            self._timestamp_saida = _parse_iso(self._timestamp_saida_iso)
+        return self._timestamp_saida
+
+    @timestamp_saida.setter
+    def timestamp_saida(self, valor: Union[datetime, str, None]):
+        if isinstance(valor, str):
+            self._timestamp_saida = None
+            self._timestamp_saida_iso = valor
+        else:
+            self._timestamp_saida = valor
+            self._timestamp_saida_iso = None
+
+    @property
+    def timestamp_saida_iso(self) -> Optional[str]:
+        """Timestamp de saída em formato ISO."""
+        if self._timestamp_saida_iso is None and self._timestamp_saida is not None:
+            self._timestamp_saida_iso = self._timestamp_saida.isoformat()
+        return self._timestamp_saida_iso
+
     def calcular_tempo_permanencia(self, timestamp_saida: datetime) -> int:
-        """Calcula o tempo de permanência em minutos."""
+        """Calcula o tempo de permanência em minutos (arredondado para cima)."""
         delta = timestamp_saida - self.timestamp_entrada
-        minutos = int(delta.total_seconds() / 60)
-        # Arredonda para cima se houver segundos excedentes
-        if delta.total_seconds() % 60 > 0:
-            minutos += 1
-        return minutos
+        # Ceil-division inteira sobre os campos do timedelta: evita a dupla
+        # chamada a total_seconds() e o módulo em ponto flutuante
+        microssegundos = (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+        return -(-microssegundos // 60_000_000)
     
     def calcular_valor(self, preco_por_minuto: float, valor_minimo: float) -> float:
         """Calcula o valor a ser cobrado."""
         if self.tempo_permanencia_minutos is None:
             return valor_minimo
-        
-        valor = self.tempo_permanencia_minutos * preco_por_minuto
-        return max(valor, valor_minimo)
+
+        # Aritmética inteira em centavos: evita deriva de arredondamento
+        # em ponto flutuante nos totais monetários
+        centavos = _calcular_valor_centavos(
+            self.tempo_permanencia_minutos,
+            round(preco_por_minuto * 100),
+            round(valor_minimo * 100)
+        )
+        return centavos / 100.0
     
     def processar_saida(
         self,
@@ -64,16 +139,16 @@ class Veiculo:
             "placa": self.placa,
             "tempo_permanencia_minutos": self.tempo_permanencia_minutos,
             "valor_calculado": self.valor_calculado,
-            "timestamp_entrada": self.timestamp_entrada.isoformat(),
-            "timestamp_saida": self.timestamp_saida.isoformat()
+            "timestamp_entrada": self.timestamp_entrada_iso,
+            "timestamp_saida": self.timestamp_saida_iso
         }
     
     def to_dict(self) -> dict:
         """Converte o veículo para dicionário."""
         return {
             "placa": self.placa,
-            "timestamp_entrada": self.timestamp_entrada.isoformat(),
-            "timestamp_saida": self.timestamp_saida.isoformat() if self.timestamp_saida else None,
+            "timestamp_entrada": self.timestamp_entrada_iso,
+            "timestamp_saida": self.timestamp_saida_iso,
             "andar": self.andar,
             "vaga": self.vaga,
             "status": self.status.value,
@@ -86,15 +161,15 @@ class Veiculo:
         """Cria um veículo a partir de um dicionário."""
         veiculo = cls(
             placa=data["placa"],
-            timestamp_entrada=datetime.fromisoformat(data["timestamp_entrada"]),
+            timestamp_entrada=data["timestamp_entrada"],
             andar=data.get("andar", "terreo"),
             vaga=data.get("vaga")
         )
         
         if data.get("timestamp_saida"):
-            veiculo.timestamp_saida = datetime.fromisoformat(data["timestamp_saida"])
+            veiculo.timestamp_saida = data["timestamp_saida"]
         
-        veiculo.status = StatusVeiculo(data.get("status", "estacionado"))
+        veiculo.status = _STATUS_POR_VALOR[data.get("status", "estacionado")]
         veiculo.valor_calculado = data.get("valor_calculado")
         veiculo.tempo_permanencia_minutos = data.get("tempo_permanencia_minutos")
         
@@ -3,6 +3,8 @@ Serviço de controle de cancelas.
 """
 import asyncio
 import logging
+import random
+import time
 from enum import Enum
 from typing import Optional
 
@@ -33,6 +35,18 @@ class CancelaService:
         self.sensor_presenca = False
         self.sensor_passagem = False
         self.timeout_abertura = 10  # segundos
+        # Sinalizado pelo sensor de passagem (via registrar_passagem)
+        self._evento_passagem = asyncio.Event()
+
+        # Protótipo do dicionário de status (campos fixos preenchidos uma vez)
+        self._status_template = {
+            "tipo": tipo.value,
+            "status": self.status.value,
+            "endereco_modbus": endereco_modbus,
+            "sensor_presenca": False,
+            "sensor_passagem": False,
+            "modo_simulacao": modo_simulacao
+        }
         
     async def detectar_presenca(self) -> bool:
         """
@@ -49,7 +63,6 @@ class CancelaService:
     async def _simular_sensor_presenca(self) -> bool:
         """Simula detecção de presença."""
         # Em modo simulação, alterna a presença periodicamente
-        import random
         self.sensor_presenca = random.random() < 0.3  # 30% chance de detectar veículo
         
         if self.sensor_presenca:
@@ -158,62 +171,88 @@ class CancelaService:
         """
         timeout = timeout or self.timeout_abertura
         logger.info(f"Aguardando passagem do veículo (timeout: {timeout}s)...")
-        
-        start_time = asyncio.get_event_loop().time()
-        
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            if self.modo_simulacao:
-                # Em simulação, simula passagem após alguns segundos
-                await asyncio.sleep(1)
-                if (asyncio.get_event_loop().time() - start_time) > 3:
-                    logger.info("Veículo passou pela cancela (simulação)")
-                    return True
-            else:
-                # Aqui seria implementada a leitura do sensor de passagem
-                await asyncio.sleep(0.5)
-                # Por enquanto, simula
-                if (asyncio.get_event_loop().time() - start_time) > 5:
-                    return True
-        
-        logger.warning("Timeout na passagem do veículo")
-        return False
+
+        self._evento_passagem.clear()
+        self.sensor_passagem = False
+
+        if self.modo_simulacao:
+            # Em simulação, o veículo passa após alguns segundos
+            tempo_passagem = 3.0
+            if timeout <= tempo_passagem:
+                await asyncio.sleep(timeout)
+                logger.warning("Timeout na passagem do veículo")
+                return False
+
+            await asyncio.sleep(tempo_passagem)
+            logger.info("Veículo passou pela cancela (simulação)")
+            return True
+
+        # Em hardware, aguarda o sensor sinalizar via registrar_passagem
+        # em vez de fazer polling periódico do relógio
+        inicio = time.monotonic()
+        try:
+            await asyncio.wait_for(self._evento_passagem.wait(), timeout=timeout)
+            logger.info(f"Veículo passou pela cancela ({time.monotonic() - inicio:.1f}s)")
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Timeout na passagem do veículo")
+            return False
+
+    def registrar_passagem(self):
+        """Sinaliza a passagem do veículo (chamado pela leitura do sensor)."""
+        self.sensor_passagem = True
+        self._evento_passagem.set()
     
-    async def ciclo_completo(self) -> bool:
+    async def ciclo_completo(self, preparacao=None) -> bool:
         """
         Executa um ciclo completo: abrir -> aguardar passagem -> fechar.
-        
+
+        Args:
+            preparacao: Corrotina opcional executada em paralelo à abertura
+                (ex.: pré-armar a captura LPR para o próximo veículo)
+
         Returns:
             bool: True se o ciclo foi bem-sucedido
         """
         logger.info(f"Iniciando ciclo completo da cancela {self.tipo.value}")
-        
-        # Abre a cancela
-        if not await self.abrir_cancela():
+        inicio = time.perf_counter()
+
+        # Abre a cancela; trabalho de preparação roda enquanto o motor abre
+        if preparacao is None:
+            aberta = await self.abrir_cancela()
+        else:
+            async with asyncio.TaskGroup() as tg:
+                tarefa_abertura = tg.create_task(self.abrir_cancela())
+                tg.create_task(preparacao)
+            aberta = tarefa_abertura.result()
+
+        if not aberta:
             return False
-        
+
         # Aguarda passagem
         if not await self.aguardar_passagem():
             logger.warning("Veículo não passou - fechando cancela")
             await self.fechar_cancela()
             return False
-        
+
         # Fecha a cancela
         if not await self.fechar_cancela():
             return False
-        
-        logger.info(f"Ciclo completo da cancela {self.tipo.value} finalizado")
+
+        logger.info(
+            f"Ciclo completo da cancela {self.tipo.value} finalizado "
+            f"em {time.perf_counter() - inicio:.1f}s"
+        )
         return True
     
     def obter_status(self) -> dict:
         """Retorna o status atual da cancela."""
-        return {
-            "tipo": self.tipo.value,
-            "status": self.status.value,
-            "endereco_modbus": self.endereco_modbus,
-            "sensor_presenca": self.sensor_presenca,
-            "sensor_passagem": self.sensor_passagem,
-            "modo_simulacao": self.modo_simulacao
-        }
+        template = self._status_template
+        template["status"] = self.status.value
+        template["sensor_presenca"] = self.sensor_presenca
+        template["sensor_passagem"] = self.sensor_passagem
+        template["modo_simulacao"] = self.modo_simulacao
+        return template.copy()
     
     def configurar_modo(self, modo_simulacao: bool):
         """Configura o modo de operação."""
@@ -3,12 +3,29 @@ Serviço de reconhecimento de placas (LPR).
 """
 import asyncio
 import random
+import re
 import string
+import time
+from collections import deque
 from typing import Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Importação condicional do numpy (geração vetorizada de placas)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+    _RNG = np.random.default_rng()
+    _LETRAS = np.frombuffer(string.ascii_uppercase.encode(), dtype=np.uint8)
+    _DIGITOS = np.frombuffer(string.digits.encode(), dtype=np.uint8)
+except ImportError:
+    NUMPY_AVAILABLE = False
+    _RNG = None
+
+# Regex pré-compilada do formato de placa (3 letras + 4 números)
+_PLACA_RE = re.compile(r"[A-Z]{3}[0-9]{4}")
+
 
 class LPRService:
     """Serviço para reconhecimento de placas."""
@@ -16,11 +33,21 @@ class LPRService:
     def __init__(self, modo_simulacao: bool = True, timeout: int = 5):
         self.modo_simulacao = modo_simulacao
         self.timeout = timeout
-        self.placas_simuladas = [
+        self.placas_simuladas = (
             "ABC1234", "DEF5678", "GHI9012", "JKL3456",
             "MNO7890", "PQR1234", "STU5678", "VWX9012",
             "YZA3456", "BCD7890"
-        ]
+        )
+        # Índices pré-sorteados em lote para _simular_captura
+        self._indices_simulados: deque = deque()
+        self._tamanho_lote_indices = 1024
+
+        # Protótipo do dicionário de estatísticas (campos fixos preenchidos uma vez)
+        self._estatisticas_template = {
+            "modo": "simulação" if modo_simulacao else "hardware",
+            "timeout": timeout,
+            "total_placas_simuladas": len(self.placas_simuladas)
+        }
     
     async def capturar_placa(self) -> Tuple[Optional[str], float]:
         """
@@ -43,7 +70,7 @@ class LPRService:
         
         # 90% de chance de sucesso
         if random.random() < 0.9:
-            placa = random.choice(self.placas_simuladas)
+            placa = self.placas_simuladas[self._proximo_indice_simulado()]
             confianca = random.uniform(0.7, 0.98)
             logger.info(f"Placa capturada: {placa} (confiança: {confianca:.2f})")
             return placa, confianca
@@ -51,20 +78,29 @@ class LPRService:
             logger.warning("Falha na captura da placa")
             return None, 0.0
     
+    def _proximo_indice_simulado(self) -> int:
+        """Retorna o próximo índice pré-sorteado de placa simulada."""
+        if not self._indices_simulados:
+            total = len(self.placas_simuladas)
+            if NUMPY_AVAILABLE:
+                self._indices_simulados.extend(
+                    _RNG.integers(0, total, size=self._tamanho_lote_indices).tolist()
+                )
+            else:
+                self._indices_simulados.extend(
+                    random.randrange(total) for _ in range(self._tamanho_lote_indices)
+                )
+        return self._indices_simulados.popleft()
+
     async def _capturar_hardware(self) -> Tuple[Optional[str], float]:
         """Captura placa usando hardware real."""
         logger.info("Iniciando captura via hardware...")
         
         try:
-            # Aqui seria implementada a comunicação com a câmera LPR real
-            # Via MODBUS ou protocolo específico do fabricante
-            
-            # Por enquanto, retorna simulação
-            await asyncio.sleep(2)
-            
-            # Simulando resposta do hardware
-            placa = self._gerar_placa_aleatoria()
-            confianca = random.uniform(0.8, 0.95)
+            # A inferência no hardware é síncrona (chamada C bloqueante):
+            # roda em thread para não travar o event loop durante os
+            # centenas de ms de processamento da câmera/OCR
+            placa, confianca = await asyncio.to_thread(self._capturar_hardware_sync)
             
             logger.info(f"Placa capturada via hardware: {placa} (confiança: {confianca:.2f})")
             return placa, confianca
@@ -72,12 +108,48 @@ class LPRService:
         except Exception as e:
             logger.error(f"Erro na captura via hardware: {e}")
             return None, 0.0
+
+    def _capturar_hardware_sync(self) -> Tuple[str, float]:
+        """Porção bloqueante da captura (executada fora do event loop)."""
+        # Aqui seria implementada a comunicação com a câmera LPR real
+        # Via MODBUS ou protocolo específico do fabricante
+        
+        # Por enquanto, retorna simulação
+        time.sleep(2)
+        
+        # Simulando resposta do hardware
+        placa = self._gerar_placa_aleatoria()
+        confianca = random.uniform(0.8, 0.95)
+        return placa, confianca
     
     def _gerar_placa_aleatoria(self) -> str:
         """Gera uma placa aleatória no formato brasileiro."""
-        letras = ''.join(random.choices(string.ascii_uppercase, k=3))
-        numeros = ''.join(random.choices(string.digits, k=4))
-        return f"{letras}{numeros}"
+        return self._gerar_placas_aleatorias(1)[0]
+
+    @staticmethod
+    def _gerar_placas_aleatorias(quantidade: int) -> list:
+        """
+        Gera um lote de placas aleatórias no formato brasileiro.
+
+        Args:
+            quantidade: Número de placas a gerar
+
+        Returns:
+            list: Placas geradas
+        """
+        if NUMPY_AVAILABLE:
+            # Sorteia todos os caracteres do lote de uma vez e monta as
+            # placas como linhas de bytes de largura fixa
+            letras = _LETRAS[_RNG.integers(0, 26, size=(quantidade, 3))]
+            numeros = _DIGITOS[_RNG.integers(0, 10, size=(quantidade, 4))]
+            placas = np.concatenate([letras, numeros], axis=1)
+            return [linha.tobytes().decode("ascii") for linha in placas]
+
+        return [
+            ''.join(random.choices(string.ascii_uppercase, k=3))
+            + ''.join(random.choices(string.digits, k=4))
+            for _ in range(quantidade)
+        ]
     
     async def validar_placa(self, placa: str, confianca_minima: float = 0.7) -> bool:
         """
@@ -92,23 +164,15 @@ class LPRService:
         """
         if not placa:
             return False
-        
-        # Validação básica do formato da placa
-        if len(placa) != 7:
-            logger.warning(f"Placa com formato inválido: {placa}")
-            return False
-        
-        # Verifica se os primeiros 3 caracteres são letras
-        if not placa[:3].isalpha():
-            logger.warning(f"Formato de placa inválido: {placa}")
-            return False
-        
-        # Verifica se os últimos 4 caracteres são números
-        if not placa[3:].isdigit():
-            logger.warning(f"Formato de placa inválido: {placa}")
+
+        # Validação do formato da placa em uma única passada pela regex
+        # pré-compilada; logs em DEBUG com formatação adiada, pois esta
+        # função roda para toda leitura de placa
+        if not _PLACA_RE.fullmatch(placa):
+            logger.warning("Placa com formato inválido: %s", placa)
             return False
-        
-        logger.info(f"Placa validada com sucesso: {placa}")
+
+        logger.debug("Placa validada com sucesso: %s", placa)
         return True
     
     def configurar_modo(self, modo_simulacao: bool):
@@ -119,8 +183,7 @@ class LPRService:
     
     def obter_estatisticas(self) -> dict:
         """Retorna estatísticas do serviço LPR."""
-        return {
-            "modo": "simulação" if self.modo_simulacao else "hardware",
-            "timeout": self.timeout,
-            "total_placas_simuladas": len(self.placas_simuladas)
-        }
+        template = self._estatisticas_template
+        template["modo"] = "simulação" if self.modo_simulacao else "hardware"
+        template["timeout"] = self.timeout
+        return template.copy()
@@ -3,93 +3,142 @@ Serviço de controle do placar de vagas.
 """
 import asyncio
 import logging
+import random
 from typing import Dict, List
 
+# Importação condicional do numpy (empacotamento vetorizado das coils)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
 class PlacarService:
     """Serviço para controle do placar de vagas."""
-    
+
     def __init__(
         self,
         endereco_modbus: int,
         total_vagas: int = 8,
         endereco_inicial_vagas: int = 0,
-        modo_simulacao: bool = True
+        modo_simulacao: bool = True,
+        modbus_client=None
     ):
         self.endereco_modbus = endereco_modbus
         self.total_vagas = total_vagas
         self.endereco_inicial_vagas = endereco_inicial_vagas
         self.modo_simulacao = modo_simulacao
-        
-        # Estado das vagas (True = ocupada, False = livre)
-        self.vagas: Dict[int, bool] = {i: False for i in range(total_vagas)}
-        self.vagas_livres = total_vagas
-        
-    async def ler_sensores_vagas(self) -> Dict[int, bool]:
+        # Cliente MODBUS compartilhado para leitura em lote dos sensores
+        self.modbus_client = modbus_client
+
+        # Estado das vagas como bitmask (bit n = 1 -> vaga n ocupada):
+        # ocupar/liberar viram operações de bit e a contagem de livres
+        # é um único bit_count(), sem varrer dicionário
+        self._mask: int = 0
+
+        # Sinalizado por ocupar_vaga/liberar_vaga: acorda o monitoramento
+        # imediatamente em vez de esperar o próximo ciclo de polling
+        self._vagas_alteradas = asyncio.Event()
+
+        # Flag de "placar sujo": rajadas de ocupar/liberar viram uma única
+        # atualização, consumida pela tarefa de _consumir_atualizacoes_placar
+        self._placar_dirty = asyncio.Event()
+        self._consumidor_placar = None
+
+    @property
+    def vagas(self) -> Dict[int, bool]:
+        """Visão das vagas como dicionário (True = ocupada)."""
+        mask = self._mask
+        return {i: bool(mask >> i & 1) for i in range(self.total_vagas)}
+
+    @property
+    def vagas_livres(self) -> int:
+        """Quantidade de vagas livres."""
+        return self.total_vagas - self._mask.bit_count()
+
+    async def ler_sensores_vagas(self) -> int:
         """
         Lê o estado de todos os sensores de vagas.
-        
+
         Returns:
-            Dict[int, bool]: Estado de cada vaga (True = ocupada)
+            int: Bitmask do estado das vagas (bit ligado = ocupada)
         """
         if self.modo_simulacao:
             return await self._simular_leitura_vagas()
         else:
             return await self._ler_vagas_modbus()
-    
-    async def _simular_leitura_vagas(self) -> Dict[int, bool]:
+
+    async def _simular_leitura_vagas(self) -> int:
         """Simula a leitura das vagas."""
-        import random
-        
         # Simula mudanças ocasionais nas vagas
+        mask = self._mask
         for vaga in range(self.total_vagas):
             if random.random() < 0.05:  # 5% chance de mudança
-                self.vagas[vaga] = not self.vagas[vaga]
-        
-        return self.vagas.copy()
-    
-    async def _ler_vagas_modbus(self) -> Dict[int, bool]:
+                mask ^= 1 << vaga
+        self._mask = mask
+
+        return mask
+
+    async def _ler_vagas_modbus(self) -> int:
         """Lê as vagas via MODBUS."""
         try:
-            # Aqui seria implementada a leitura via MODBUS
-            # dos endereços dos sensores das vagas
-            await asyncio.sleep(0.1)
-            
-            # Por enquanto, retorna estado atual
-            return self.vagas.copy()
-            
+            if self.modbus_client is None:
+                # Sem cliente configurado, apenas cede o loop
+                await asyncio.sleep(0)
+                return self._mask
+
+            # Uma única requisição read_coils cobre todos os sensores:
+            # N leituras pequenas pagariam N frames + N silêncios de 3,5
+            # caracteres no barramento RTU
+            valores = await self.modbus_client.ler_multiplas_coils_raw(
+                self.endereco_inicial_vagas,
+                self.total_vagas,
+                slave_id=self.endereco_modbus
+            )
+            if valores is None:
+                return self._mask
+
+            # Empacota a resposta direto na bitmask: com numpy, packbits
+            # converte o vetor de coils em bytes sem loop por elemento
+            if NUMPY_AVAILABLE and isinstance(valores, np.ndarray):
+                empacotado = np.packbits(valores[:self.total_vagas], bitorder='little')
+                mask = int.from_bytes(empacotado.tobytes(), 'little')
+            else:
+                mask = 0
+                for i, ocupada in enumerate(valores[:self.total_vagas]):
+                    if ocupada:
+                        mask |= 1 << i
+            self._mask = mask
+            return mask
+
         except Exception as e:
             logger.error(f"Erro ao ler sensores de vagas: {e}")
-            return self.vagas.copy()
-    
+            return self._mask
+
     async def atualizar_vagas(self) -> bool:
         """
         Atualiza o estado das vagas lendo os sensores.
-        
+
         Returns:
             bool: True se houve mudanças
         """
-        estado_anterior = self.vagas.copy()
-        vagas_livres_anterior = self.vagas_livres
-        
-        # Lê estado atual dos sensores
-        novo_estado = await self.ler_sensores_vagas()
-        self.vagas = novo_estado
-        
-        # Calcula vagas livres
-        self.vagas_livres = sum(1 for ocupada in self.vagas.values() if not ocupada)
-        
+        mask_anterior = self._mask
+
+        # Lê estado atual dos sensores (atualiza a bitmask)
+        await self.ler_sensores_vagas()
+
         # Verifica se houve mudanças
-        mudancas = estado_anterior != self.vagas
-        
+        mudancas = mask_anterior != self._mask
+
         if mudancas:
-            logger.info(f"Vagas atualizadas: {self.vagas_livres}/{self.total_vagas} livres")
+            logger.info("Vagas atualizadas: %d/%d livres", self.vagas_livres, self.total_vagas)
             await self._atualizar_placar()
-        
+
         return mudancas
-    
+
     async def _atualizar_placar(self) -> bool:
         """Atualiza o display do placar."""
         try:
@@ -97,132 +146,186 @@ class PlacarService:
                 await self._simular_atualizacao_placar()
             else:
                 await self._atualizar_placar_modbus()
-            
-            logger.info(f"Placar atualizado: {self.vagas_livres} vagas livres")
+
+            logger.info("Placar atualizado: %d vagas livres", self.vagas_livres)
             return True
-            
+
         except Exception as e:
             logger.error(f"Erro ao atualizar placar: {e}")
             return False
-    
+
     async def _simular_atualizacao_placar(self):
         """Simula atualização do placar."""
-        await asyncio.sleep(0.5)
-        logger.debug(f"[PLACAR] Vagas livres: {self.vagas_livres:02d}")
-    
+        await asyncio.sleep(0)
+        logger.debug("[PLACAR] Vagas livres: %02d", self.vagas_livres)
+
     async def _atualizar_placar_modbus(self):
         """Atualiza placar via MODBUS."""
         # Aqui seria implementada a escrita via MODBUS
         # para atualizar o display do placar
-        await asyncio.sleep(0.5)
-    
+        await asyncio.sleep(0)
+
     def ocupar_vaga(self, numero_vaga: int) -> bool:
         """
         Marca uma vaga como ocupada.
-        
+
         Args:
             numero_vaga: Número da vaga (0-based)
-            
+
         Returns:
             bool: True se a operação foi bem-sucedida
         """
         if numero_vaga < 0 or numero_vaga >= self.total_vagas:
             logger.error(f"Número de vaga inválido: {numero_vaga}")
             return False
-        
-        if self.vagas[numero_vaga]:
-            logger.warning(f"Vaga {numero_vaga} já está ocupada")
+
+        bit = 1 << numero_vaga
+        if self._mask & bit:
+            logger.warning("Vaga %d já está ocupada", numero_vaga)
             return False
-        
-        self.vagas[numero_vaga] = True
-        self.vagas_livres -= 1
-        logger.info(f"Vaga {numero_vaga} marcada como ocupada")
-        
-        # Agenda atualização do placar
-        asyncio.create_task(self._atualizar_placar())
+
+        self._mask |= bit
+        self._vagas_alteradas.set()
+        logger.info("Vaga %d marcada como ocupada", numero_vaga)
+
+        # Marca o placar para atualização (coalescida)
+        self._marcar_placar_sujo()
         return True
-    
+
     def liberar_vaga(self, numero_vaga: int) -> bool:
         """
         Marca uma vaga como livre.
-        
+
         Args:
             numero_vaga: Número da vaga (0-based)
-            
+
         Returns:
             bool: True se a operação foi bem-sucedida
         """
         if numero_vaga < 0 or numero_vaga >= self.total_vagas:
             logger.error(f"Número de vaga inválido: {numero_vaga}")
             return False
-        
-        if not self.vagas[numero_vaga]:
-            logger.warning(f"Vaga {numero_vaga} já está livre")
+
+        bit = 1 << numero_vaga
+        if not self._mask & bit:
+            logger.warning("Vaga %d já está livre", numero_vaga)
             return False
-        
-        self.vagas[numero_vaga] = False
-        self.vagas_livres += 1
-        logger.info(f"Vaga {numero_vaga} marcada como livre")
-        
-        # Agenda atualização do placar
-        asyncio.create_task(self._atualizar_placar())
+
+        self._mask &= ~bit
+        self._vagas_alteradas.set()
+        logger.info("Vaga %d marcada como livre", numero_vaga)
+
+        # Marca o placar para atualização (coalescida)
+        self._marcar_placar_sujo()
         return True
-    
+
+    def _marcar_placar_sujo(self):
+        """Marca o placar como desatualizado (O(1) no caminho quente).
+
+        N mutações em sequência produzem uma única escrita no display: a
+        tarefa consumidora relê o estado mais recente quando acorda.
+        """
+        self._placar_dirty.set()
+        self._garantir_consumidor_placar()
+
+    def _garantir_consumidor_placar(self):
+        """Garante uma única tarefa consumidora das atualizações do placar."""
+        if self._consumidor_placar is not None and not self._consumidor_placar.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fora do event loop a flag fica pendente; a tarefa nasce na
+            # próxima mutação (ou monitoramento) dentro do loop
+            return
+        self._consumidor_placar = loop.create_task(self._consumir_atualizacoes_placar())
+
+    async def _consumir_atualizacoes_placar(self):
+        """Tarefa única que consome os pedidos de atualização do placar."""
+        while True:
+            await self._placar_dirty.wait()
+            self._placar_dirty.clear()
+            await self._atualizar_placar()
+
     def encontrar_vaga_livre(self) -> int:
         """
         Encontra uma vaga livre.
-        
+
         Returns:
             int: Número da vaga livre (-1 se não houver)
         """
-        for numero, ocupada in self.vagas.items():
-            if not ocupada:
-                return numero
-        return -1
-    
+        # Bit zero mais baixo da bitmask em O(1): mantém a semântica de
+        # "menor vaga livre" sem varrer as vagas uma a uma
+        mask = self._mask
+        numero = (~mask & (mask + 1)).bit_length() - 1
+        return numero if numero < self.total_vagas else -1
+
+    def encontrar_vaga_ocupada(self) -> int:
+        """
+        Encontra uma vaga ocupada.
+
+        Returns:
+            int: Número da vaga ocupada (-1 se não houver)
+        """
+        # Bit um mais baixo da bitmask em O(1)
+        mask = self._mask
+        return (mask & -mask).bit_length() - 1 if mask else -1
+
     def obter_estatisticas(self) -> dict:
         """Retorna estatísticas das vagas."""
-        ocupadas = [num for num, ocupada in self.vagas.items() if ocupada]
-        livres = [num for num, ocupada in self.vagas.items() if not ocupada]
-        
+        mask = self._mask
+        ocupadas = [num for num in range(self.total_vagas) if mask >> num & 1]
+        livres = [num for num in range(self.total_vagas) if not mask >> num & 1]
+        vagas_livres = self.total_vagas - len(ocupadas)
+
         return {
             "total_vagas": self.total_vagas,
-            "vagas_livres": self.vagas_livres,
-            "vagas_ocupadas": self.total_vagas - self.vagas_livres,
-            "percentual_ocupacao": ((self.total_vagas - self.vagas_livres) / self.total_vagas) * 100,
+            "vagas_livres": vagas_livres,
+            "vagas_ocupadas": len(ocupadas),
+            "percentual_ocupacao": (len(ocupadas) / self.total_vagas) * 100,
             "vagas_ocupadas_numeros": ocupadas,
             "vagas_livres_numeros": livres,
-            "estacionamento_cheio": self.vagas_livres == 0
+            "estacionamento_cheio": vagas_livres == 0
         }
-    
+
     def obter_status(self) -> dict:
         """Retorna o status atual do placar."""
         return {
             "endereco_modbus": self.endereco_modbus,
             "modo_simulacao": self.modo_simulacao,
-            "vagas": self.vagas.copy(),
+            "vagas": self.vagas,
             **self.obter_estatisticas()
         }
-    
+
     def configurar_modo(self, modo_simulacao: bool):
         """Configura o modo de operação."""
         self.modo_simulacao = modo_simulacao
         modo_str = "simulação" if modo_simulacao else "hardware"
         logger.info(f"Modo placar configurado para: {modo_str}")
-    
+
     async def iniciar_monitoramento(self, intervalo: int = 5):
         """
         Inicia monitoramento contínuo das vagas.
-        
+
         Args:
             intervalo: Intervalo entre verificações em segundos
         """
         logger.info(f"Iniciando monitoramento das vagas (intervalo: {intervalo}s)")
-        
+
+        # Consumidor único das atualizações de placar (ver _marcar_placar_sujo);
+        # chamadas repetidas não duplicam a tarefa
+        self._garantir_consumidor_placar()
+
         while True:
             try:
+                # Acorda imediatamente quando uma vaga muda; o timeout ainda
+                # força uma releitura periódica dos sensores
+                try:
+                    await asyncio.wait_for(self._vagas_alteradas.wait(), timeout=intervalo)
+                except asyncio.TimeoutError:
+                    pass
+                self._vagas_alteradas.clear()
                 await self.atualizar_vagas()
-                await asyncio.sleep(intervalo)
             except Exception as e:
                 logger.error(f"Erro no monitoramento das vagas: {e}")
                 await asyncio.sleep(intervalo)
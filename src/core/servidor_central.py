@@ -2,24 +2,81 @@
 Servidor Central - Gerencia eventos e cálculos do estacionamento.
 """
 import asyncio
+import itertools
 import json
 import logging
 import sqlite3
+import threading
+import time
 import os
-import sys
-from datetime import datetime
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
 
-# Adiciona o diretório raiz ao path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from src.core.models.evento import Evento, TipoEvento, StatusEvento, EventoResposta
 from src.core.models.veiculo import Veiculo
 
+# Importação condicional do orjson (codec JSON em C para o caminho quente)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps  # retorna bytes direto
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
+# SQL dos caminhos quentes em constantes de módulo: o mesmo objeto str
+# interned é reaproveitado em cada chamada e o cache de statements do
+# sqlite3 acerta de primeira
+SQL_INSERT_EVENTO = """
+    INSERT INTO eventos (
+        placa, tipo, timestamp, confianca_lpr, andar,
+        status, valor_calculado, tempo_permanencia_minutos, erro_descricao
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERT_VEICULO = """
+    INSERT INTO veiculos (
+        placa, timestamp_entrada, timestamp_saida, andar,
+        vaga, status, valor_calculado, tempo_permanencia_minutos
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_UPDATE_VEICULO = """
+    UPDATE veiculos SET
+        timestamp_saida = ?,
+        status = ?,
+        valor_calculado = ?,
+        tempo_permanencia_minutos = ?
+    WHERE placa = ? AND timestamp_entrada = ?
+"""
+
+SQL_ENTRADAS_HOJE = """
+    SELECT COUNT(*) FROM eventos
+    WHERE tipo = 'entrada'
+    AND timestamp >= date('now')
+    AND timestamp < date('now', '+1 day')
+"""
+
+SQL_SAIDAS_HOJE = """
+    SELECT COUNT(*) FROM eventos
+    WHERE tipo = 'saida'
+    AND timestamp >= date('now')
+    AND timestamp < date('now', '+1 day')
+"""
+
+SQL_RECEITA_HOJE = """
+    SELECT SUM(valor_calculado) FROM eventos
+    WHERE tipo = 'saida'
+    AND timestamp >= date('now')
+    AND timestamp < date('now', '+1 day')
+    AND valor_calculado IS NOT NULL
+"""
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,16 +106,40 @@ class ServidorCentral:
         
         # Servidor TCP
         self.server = None
-        self.clientes_conectados = []
+        # set: add/discard O(1) mesmo com muitos clientes desconectando
+        self.clientes_conectados: set = set()
         
+        # Conexão única e de longa duração com o SQLite: abre o arquivo e
+        # reparseia os PRAGMAs uma vez por processo em vez de uma vez por
+        # evento; WAL permite leituras concorrentes às escritas
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=256
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        # Serializa o acesso à conexão compartilhada entre as threads
+        # usadas por asyncio.to_thread
+        self._db_lock = threading.Lock()
+
+        # Buffer de eventos gravados em lote (um executemany por rajada
+        # em vez de um INSERT+fsync por evento)
+        self._evento_buffer: List[tuple] = []
+        self._flush_event = asyncio.Event()
+        self._flush_task = None
+        # IDs provisórios: nonce de inicialização + contador monotônico
+        # (um incremento em C, sem syscall de relógio por evento)
+        self._evento_seq = itertools.count(1)
+        self._evento_id_prefixo = f"evt_{int(time.time()):x}_"
+
         # Inicializa banco de dados
         self._inicializar_banco()
     
     def _inicializar_banco(self):
         """Inicializa o banco de dados SQLite."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             # Tabela de eventos
             cursor.execute("""
@@ -90,9 +171,18 @@ class ServidorCentral:
                     tempo_permanencia_minutos INTEGER
                 )
             """)
+
+            # Índices para as consultas quentes: estatísticas por tipo/dia
+            # e atualização de saída por placa/entrada viram range scans
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_eventos_tipo_ts
+                ON eventos(tipo, timestamp)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_veiculos_placa_ts
+                ON veiculos(placa, timestamp_entrada)
+            """)
             
-            conn.commit()
-            conn.close()
             logger.info("Banco de dados inicializado")
             
         except Exception as e:
@@ -101,17 +191,34 @@ class ServidorCentral:
     async def iniciar_servidor(self):
         """Inicia o servidor TCP."""
         try:
+            # Tarefas curtas rodam inline até o primeiro await real
+            # (eager task factory, disponível a partir do Python 3.12)
+            fabrica_eager = getattr(asyncio, "eager_task_factory", None)
+            if fabrica_eager is not None:
+                asyncio.get_running_loop().set_task_factory(fabrica_eager)
+
             self.server = await asyncio.start_server(
                 self._handle_cliente,
                 self.host,
-                self.port
+                self.port,
+                limit=64 * 1024  # mensagens grandes não estouram o readline
             )
             
             addr = self.server.sockets[0].getsockname()
             logger.info(f"Servidor Central iniciado em {addr[0]}:{addr[1]}")
-            
-            async with self.server:
-                await self.server.serve_forever()
+
+            # Gravador em lote dos eventos enfileirados por _salvar_evento
+            self._flush_task = asyncio.create_task(self._flush_eventos())
+
+            try:
+                async with self.server:
+                    await self.server.serve_forever()
+            finally:
+                # Drena o buffer antes de encerrar
+                self._flush_task.cancel()
+                if self._evento_buffer:
+                    rows, self._evento_buffer = self._evento_buffer, []
+                    self._gravar_eventos_sync(rows)
                 
         except Exception as e:
             logger.error(f"Erro ao iniciar servidor: {e}")
@@ -119,41 +226,42 @@ class ServidorCentral:
     async def _handle_cliente(self, reader, writer):
         """Manipula conexões de clientes."""
         addr = writer.get_extra_info('peername')
-        logger.info(f"Cliente conectado: {addr}")
-        self.clientes_conectados.append(writer)
+        logger.info("Cliente conectado: %s", addr)
+        self.clientes_conectados.add(writer)
         
         try:
             while True:
-                data = await reader.read(1024)
+                # Enquadramento por linha: cada mensagem termina em '\n',
+                # então segmentos TCP coalescidos não quebram o parse
+                data = await reader.readline()
                 if not data:
                     break
                 
-                # Decodifica mensagem JSON
-                mensagem = data.decode('utf-8').strip()
-                logger.debug(f"Mensagem recebida de {addr}: {mensagem}")
+                logger.debug("Mensagem recebida de %s: %s", addr, data)
                 
                 try:
-                    dados = json.loads(mensagem)
+                    # Decodifica mensagem JSON direto dos bytes
+                    dados = _json_loads(data)
                     resposta = await self._processar_evento(dados)
                     
-                    # Envia resposta
-                    resposta_json = json.dumps(resposta.dict()) + '\n'
-                    writer.write(resposta_json.encode('utf-8'))
+                    # Envia resposta: dois write() no buffer do StreamWriter
+                    # saem em um único send(), sem concatenar bytes
+                    writer.write(_json_dumps(resposta.dict()))
+                    writer.write(b'\n')
                     await writer.drain()
                     
-                except json.JSONDecodeError:
-                    logger.error(f"Mensagem JSON inválida de {addr}: {mensagem}")
+                except ValueError:
+                    logger.error("Mensagem JSON inválida de %s: %s", addr, data)
                 except Exception as e:
-                    logger.error(f"Erro ao processar evento de {addr}: {e}")
+                    logger.error("Erro ao processar evento de %s: %s", addr, e)
                     
         except Exception as e:
-            logger.error(f"Erro na conexão com {addr}: {e}")
+            logger.error("Erro na conexão com %s: %s", addr, e)
         finally:
-            if writer in self.clientes_conectados:
-                self.clientes_conectados.remove(writer)
+            self.clientes_conectados.discard(writer)
             writer.close()
             await writer.wait_closed()
-            logger.info(f"Cliente desconectado: {addr}")
+            logger.info("Cliente desconectado: %s", addr)
     
     async def _processar_evento(self, dados: dict) -> EventoResposta:
         """Processa um evento recebido."""
@@ -162,17 +270,17 @@ class ServidorCentral:
             evento = Evento(
                 placa=dados["placa"],
                 tipo=TipoEvento(dados["tipo"]),
-                timestamp=datetime.fromisoformat(dados["timestamp"]),
+                timestamp=dados["timestamp"],
                 confianca_lpr=dados["confianca_lpr"],
                 andar=dados.get("andar", "terreo")
             )
             
-            logger.info(f"Processando evento: {evento.tipo.value} - {evento.placa}")
+            logger.info("Processando evento: %s - %s", evento.tipo.value, evento.placa)
             
             # Verifica se estacionamento está fechado
             if self.estacionamento_fechado:
                 return EventoResposta(
-                    evento_id=f"evt_{datetime.now().timestamp()}",
+                    evento_id=self._gerar_evento_id(),
                     sucesso=False,
                     acao="negar_entrada",
                     mensagem="Estacionamento fechado"
@@ -181,7 +289,7 @@ class ServidorCentral:
             # Verifica se andar está bloqueado
             if self.andar_bloqueado and evento.andar == "terreo":
                 return EventoResposta(
-                    evento_id=f"evt_{datetime.now().timestamp()}",
+                    evento_id=self._gerar_evento_id(),
                     sucesso=False,
                     acao="negar_entrada",
                     mensagem="Andar bloqueado"
@@ -194,16 +302,16 @@ class ServidorCentral:
                 return await self._processar_saida(evento)
             else:
                 return EventoResposta(
-                    evento_id=f"evt_{datetime.now().timestamp()}",
+                    evento_id=self._gerar_evento_id(),
                     sucesso=False,
                     acao="erro",
                     mensagem=f"Tipo de evento não suportado: {evento.tipo.value}"
                 )
                 
         except Exception as e:
-            logger.error(f"Erro ao processar evento: {e}")
+            logger.error("Erro ao processar evento: %s", e)
             return EventoResposta(
-                evento_id=f"evt_{datetime.now().timestamp()}",
+                evento_id=self._gerar_evento_id(),
                 sucesso=False,
                 acao="erro",
                 mensagem=str(e)
@@ -212,10 +320,13 @@ class ServidorCentral:
     async def _processar_entrada(self, evento: Evento) -> EventoResposta:
         """Processa evento de entrada."""
         placa = evento.placa
+        # Liga os atributos quentes a locais (lookup de atributo por evento
+        # é mensurável no caminho crítico)
+        veiculos = self.veiculos_estacionados
         
         # Verifica se veículo já está estacionado
-        if placa in self.veiculos_estacionados:
-            logger.warning(f"Veículo {placa} já está estacionado")
+        if placa in veiculos:
+            logger.warning("Veículo %s já está estacionado", placa)
             return EventoResposta(
                 evento_id=await self._salvar_evento(evento),
                 sucesso=False,
@@ -226,19 +337,19 @@ class ServidorCentral:
         # Cria novo veículo
         veiculo = Veiculo(
             placa=placa,
-            timestamp_entrada=evento.timestamp,
+            timestamp_entrada=evento.timestamp_iso,
             andar=evento.andar
         )
         
         # Adiciona ao estacionamento
-        self.veiculos_estacionados[placa] = veiculo
+        veiculos[placa] = veiculo
         
         # Salva no banco
         evento.status = StatusEvento.CONCLUIDO
         evento_id = await self._salvar_evento(evento)
         await self._salvar_veiculo(veiculo)
         
-        logger.info(f"Entrada autorizada para {placa}")
+        logger.info("Entrada autorizada para %s", placa)
         
         return EventoResposta(
             evento_id=evento_id,
@@ -250,10 +361,11 @@ class ServidorCentral:
     async def _processar_saida(self, evento: Evento) -> EventoResposta:
         """Processa evento de saída."""
         placa = evento.placa
+        veiculos = self.veiculos_estacionados
         
         # Verifica se veículo está estacionado
-        if placa not in self.veiculos_estacionados:
-            logger.warning(f"Veículo {placa} não encontrado no estacionamento")
+        if placa not in veiculos:
+            logger.warning("Veículo %s não encontrado no estacionamento", placa)
             return EventoResposta(
                 evento_id=await self._salvar_evento(evento),
                 sucesso=False,
@@ -262,9 +374,9 @@ class ServidorCentral:
             )
         
         # Recupera veículo
-        veiculo = self.veiculos_estacionados[placa]
+        veiculo = veiculos[placa]
         
-        # Calcula valores
+        # Calcula valores (tarifas já convertidas uma única vez no __init__)
         resultado = veiculo.processar_saida(
             evento.timestamp,
             self.preco_por_minuto,
@@ -277,16 +389,17 @@ class ServidorCentral:
         evento.status = StatusEvento.CONCLUIDO
         
         # Remove do estacionamento
-        del self.veiculos_estacionados[placa]
+        del veiculos[placa]
         
         # Salva no banco
         evento_id = await self._salvar_evento(evento)
         await self._atualizar_veiculo(veiculo)
         
         logger.info(
-            f"Saída autorizada para {placa} - "
-            f"Tempo: {resultado['tempo_permanencia_minutos']}min - "
-            f"Valor: R$ {resultado['valor_calculado']:.2f}"
+            "Saída autorizada para %s - Tempo: %dmin - Valor: R$ %.2f",
+            placa,
+            resultado['tempo_permanencia_minutos'],
+            resultado['valor_calculado']
         )
         
         return EventoResposta(
@@ -299,93 +412,106 @@ class ServidorCentral:
         )
     
     async def _salvar_evento(self, evento: Evento) -> str:
-        """Salva evento no banco de dados."""
+        """Enfileira o evento para gravação em lote.
+
+        Retorna imediatamente um id provisório sequencial; a linha é
+        persistida pelo gravador em lote (_flush_eventos).
+        """
+        self._evento_buffer.append((
+            evento.placa,
+            evento.tipo.value,
+            evento.timestamp_iso,
+            evento.confianca_lpr,
+            evento.andar,
+            evento.status.value,
+            evento.valor_calculado,
+            evento.tempo_permanencia_minutos,
+            evento.erro_descricao
+        ))
+        self._flush_event.set()
+        return self._gerar_evento_id()
+
+    def _gerar_evento_id(self) -> str:
+        """Gera um id de evento único dentro do processo."""
+        return f"{self._evento_id_prefixo}{next(self._evento_seq)}"
+
+    async def _flush_eventos(self, intervalo: float = 0.1):
+        """Grava os eventos enfileirados em lotes periódicos."""
+        while True:
+            await self._flush_event.wait()
+            # Janela curta para juntar a rajada em um único executemany
+            await asyncio.sleep(intervalo)
+            self._flush_event.clear()
+            rows, self._evento_buffer = self._evento_buffer, []
+            if rows:
+                await asyncio.to_thread(self._gravar_eventos_sync, rows)
+
+    def _gravar_eventos_sync(self, rows: List[tuple]):
+        """Insere um lote de eventos no banco (executado em thread)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO eventos (
-                    placa, tipo, timestamp, confianca_lpr, andar,
-                    status, valor_calculado, tempo_permanencia_minutos, erro_descricao
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                evento.placa,
-                evento.tipo.value,
-                evento.timestamp.isoformat(),
-                evento.confianca_lpr,
-                evento.andar,
-                evento.status.value,
-                evento.valor_calculado,
-                evento.tempo_permanencia_minutos,
-                evento.erro_descricao
-            ))
-            
-            evento_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            logger.debug(f"Evento {evento_id} salvo no banco")
-            return str(evento_id)
-            
+            with self._db_lock:
+                # Transação explícita: em autocommit (isolation_level=None)
+                # cada linha do executemany ganharia seu próprio commit;
+                # assim o lote inteiro é um único fsync no WAL
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(SQL_INSERT_EVENTO, rows)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+            logger.debug("%d evento(s) salvos no banco", len(rows))
+
         except Exception as e:
-            logger.error(f"Erro ao salvar evento: {e}")
-            return f"evt_{datetime.now().timestamp()}"
+            logger.error(f"Erro ao salvar eventos: {e}")
     
     async def _salvar_veiculo(self, veiculo: Veiculo):
-        """Salva veículo no banco de dados."""
+        """Salva veículo no banco de dados sem bloquear o loop de eventos."""
+        await asyncio.to_thread(self._salvar_veiculo_sync, veiculo)
+
+    def _salvar_veiculo_sync(self, veiculo: Veiculo):
+        """Insere o veículo no banco (executado em thread)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO veiculos (
-                    placa, timestamp_entrada, timestamp_saida, andar,
-                    vaga, status, valor_calculado, tempo_permanencia_minutos
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                veiculo.placa,
-                veiculo.timestamp_entrada.isoformat(),
-                veiculo.timestamp_saida.isoformat() if veiculo.timestamp_saida else None,
-                veiculo.andar,
-                veiculo.vaga,
-                veiculo.status.value,
-                veiculo.valor_calculado,
-                veiculo.tempo_permanencia_minutos
-            ))
+            with self._db_lock:
+                cursor = self._conn.cursor()
+
+                cursor.execute(SQL_INSERT_VEICULO, (
+                    veiculo.placa,
+                    veiculo.timestamp_entrada_iso,
+                    veiculo.timestamp_saida_iso,
+                    veiculo.andar,
+                    veiculo.vaga,
+                    veiculo.status.value,
+                    veiculo.valor_calculado,
+                    veiculo.tempo_permanencia_minutos
+                ))
             
-            conn.commit()
-            conn.close()
-            logger.debug(f"Veículo {veiculo.placa} salvo no banco")
+            logger.debug("Veículo %s salvo no banco", veiculo.placa)
             
         except Exception as e:
             logger.error(f"Erro ao salvar veículo: {e}")
     
     async def _atualizar_veiculo(self, veiculo: Veiculo):
-        """Atualiza veículo no banco de dados."""
+        """Atualiza veículo no banco de dados sem bloquear o loop de eventos."""
+        await asyncio.to_thread(self._atualizar_veiculo_sync, veiculo)
+
+    def _atualizar_veiculo_sync(self, veiculo: Veiculo):
+        """Atualiza o veículo no banco (executado em thread)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE veiculos SET
-                    timestamp_saida = ?,
-                    status = ?,
-                    valor_calculado = ?,
-                    tempo_permanencia_minutos = ?
-                WHERE placa = ? AND timestamp_entrada = ?
-            """, (
-                veiculo.timestamp_saida.isoformat() if veiculo.timestamp_saida else None,
-                veiculo.status.value,
-                veiculo.valor_calculado,
-                veiculo.tempo_permanencia_minutos,
-                veiculo.placa,
-                veiculo.timestamp_entrada.isoformat()
-            ))
+            with self._db_lock:
+                cursor = self._conn.cursor()
+
+                cursor.execute(SQL_UPDATE_VEICULO, (
+                    veiculo.timestamp_saida_iso,
+                    veiculo.status.value,
+                    veiculo.valor_calculado,
+                    veiculo.tempo_permanencia_minutos,
+                    veiculo.placa,
+                    veiculo.timestamp_entrada_iso
+                ))
             
-            conn.commit()
-            conn.close()
-            logger.debug(f"Veículo {veiculo.placa} atualizado no banco")
+            logger.debug("Veículo %s atualizado no banco", veiculo.placa)
             
         except Exception as e:
             logger.error(f"Erro ao atualizar veículo: {e}")
@@ -416,36 +542,24 @@ class ServidorCentral:
         
         # Busca estatísticas do banco
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Total de entradas hoje
-            cursor.execute("""
-                SELECT COUNT(*) FROM eventos 
-                WHERE tipo = 'entrada' 
-                AND date(timestamp) = date('now')
-            """)
-            entradas_hoje = cursor.fetchone()[0]
-            
-            # Total de saídas hoje
-            cursor.execute("""
-                SELECT COUNT(*) FROM eventos 
-                WHERE tipo = 'saida' 
-                AND date(timestamp) = date('now')
-            """)
-            saidas_hoje = cursor.fetchone()[0]
-            
-            # Receita hoje
-            cursor.execute("""
-                SELECT SUM(valor_calculado) FROM eventos 
-                WHERE tipo = 'saida' 
-                AND date(timestamp) = date('now')
-                AND valor_calculado IS NOT NULL
-            """)
-            receita_hoje = cursor.fetchone()[0] or 0
-            
-            conn.close()
-            
+            with self._db_lock:
+                cursor = self._conn.cursor()
+
+                # Faixas semiabertas sobre o timestamp: date(timestamp)
+                # envolveria cada linha em uma função e descartaria o índice
+
+                # Total de entradas hoje
+                cursor.execute(SQL_ENTRADAS_HOJE)
+                entradas_hoje = cursor.fetchone()[0]
+
+                # Total de saídas hoje
+                cursor.execute(SQL_SAIDAS_HOJE)
+                saidas_hoje = cursor.fetchone()[0]
+
+                # Receita hoje
+                cursor.execute(SQL_RECEITA_HOJE)
+                receita_hoje = cursor.fetchone()[0] or 0
+
         except Exception as e:
             logger.error(f"Erro ao buscar estatísticas: {e}")
             entradas_hoje = saidas_hoje = receita_hoje = 0
@@ -474,4 +588,12 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop (loop asyncio em libuv) quando disponível: drop-in e
+    # tipicamente dobra o throughput TCP do servidor
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
@@ -4,47 +4,65 @@ Servidor Distribuído do Térreo - Controla cancelas, sensores e comunicação c
 import asyncio
 import json
 import logging
+import logging.handlers
 import os
-import sys
+import queue
+import socket
 from datetime import datetime
-from enum import Enum
+from enum import IntEnum
 from typing import Optional
 from dotenv import load_dotenv
 
-# Adiciona o diretório raiz ao path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from src.core.models.evento import Evento, TipoEvento
+from src.core.models.evento import TipoEvento
 from src.core.services.lpr_service import LPRService
 from src.core.services.cancela_service import CancelaService, TipoCancela
 from src.core.services.placar_service import PlacarService
 from src.clients.modbus_client import ModbusClient
 
+# Importação condicional do orjson (codec JSON em C para o caminho quente)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps  # retorna bytes direto
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
-# Configuração de logging
+# Configuração de logging: os logs entram numa fila em memória e uma
+# thread (QueueListener) faz o write() em arquivo/console — o event loop
+# não bloqueia em I/O de disco a cada logger.info nos caminhos quentes
+_fila_logs = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/servidor_terreo.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_fila_logs)]
 )
+_listener_logs = logging.handlers.QueueListener(
+    _fila_logs,
+    logging.FileHandler('logs/servidor_terreo.log'),
+    logging.StreamHandler()
+)
+_listener_logs.start()
 logger = logging.getLogger(__name__)
 
 
-class EstadoCancela(Enum):
-    AGUARDANDO = "aguardando"
-    DETECTOU_VEICULO = "detectou_veiculo"
-    CAPTURANDO_PLACA = "capturando_placa"
-    ENVIANDO_CENTRAL = "enviando_central"
-    AGUARDANDO_RESPOSTA = "aguardando_resposta"
-    ABRINDO_CANCELA = "abrindo_cancela"
-    AGUARDANDO_PASSAGEM = "aguardando_passagem"
-    FECHANDO_CANCELA = "fechando_cancela"
-    ERRO = "erro"
+class EstadoCancela(IntEnum):
+    # IntEnum: a comparação de estado no laço da FSM vira igualdade de
+    # inteiros em C; o nome legível sai de .name.lower() nas estatísticas
+    AGUARDANDO = 0
+    DETECTOU_VEICULO = 1
+    CAPTURANDO_PLACA = 2
+    ENVIANDO_CENTRAL = 3
+    AGUARDANDO_RESPOSTA = 4
+    ABRINDO_CANCELA = 5
+    AGUARDANDO_PASSAGEM = 6
+    FECHANDO_CANCELA = 7
+    ERRO = 8
 
 
 class ServidorTerreo:
@@ -94,13 +112,47 @@ class ServidorTerreo:
             endereco_modbus=self.endereco_placar,
             total_vagas=int(os.getenv("TOTAL_VAGAS", "8")),
             endereco_inicial_vagas=int(os.getenv("ENDERECO_INICIAL_VAGAS", "0")),
-            modo_simulacao=self.modo_simulacao
+            modo_simulacao=self.modo_simulacao,
+            modbus_client=self.modbus_client
         )
         
         # Estados das máquinas
         self.estado_entrada = EstadoCancela.AGUARDANDO
         self.estado_saida = EstadoCancela.AGUARDANDO
-        
+
+        # Eventos de detecção: sensores push (ou callbacks de hardware)
+        # acordam as máquinas de estado na hora, sem esperar o próximo poll
+        self._entrada_evt = asyncio.Event()
+        self._saida_evt = asyncio.Event()
+
+        # Conexão persistente com o central (handshake TCP uma vez, não
+        # uma vez por veículo); o lock serializa requisição/resposta
+        self._central_reader = None
+        self._central_writer = None
+        self._central_lock = asyncio.Lock()
+
+        # Protótipos dos payloads enviados ao central: os campos
+        # constantes (tipo/andar) são serializados uma única vez
+        self._tpl_entrada = {"tipo": TipoEvento.ENTRADA.value, "andar": "terreo"}
+        self._tpl_saida = {"tipo": TipoEvento.SAIDA.value, "andar": "terreo"}
+
+        # Fuso local resolvido uma única vez: datetime.now(self._tz) evita
+        # a resolução de tzinfo a cada evento no hot path
+        self._tz = datetime.now().astimezone().tzinfo
+
+        # Tabelas de transição das máquinas de estado: despacho O(1)
+        # estado -> handler em vez de cadeias de elif no laço quente
+        self._dispatch_entrada = {
+            EstadoCancela.AGUARDANDO: self._aguardar_veiculo_entrada,
+            EstadoCancela.DETECTOU_VEICULO: self._processar_entrada,
+            EstadoCancela.ERRO: self._recuperar_erro_entrada,
+        }
+        self._dispatch_saida = {
+            EstadoCancela.AGUARDANDO: self._aguardar_veiculo_saida,
+            EstadoCancela.DETECTOU_VEICULO: self._processar_saida,
+            EstadoCancela.ERRO: self._recuperar_erro_saida,
+        }
+
         # Tarefas em execução
         self.tarefas = []
     
@@ -114,19 +166,17 @@ class ServidorTerreo:
             self.modo_simulacao = True
             self.modbus_client.modo_simulacao = True
         
-        # Inicia tarefas
-        self.tarefas = [
-            asyncio.create_task(self._maquina_estado_entrada()),
-            asyncio.create_task(self._maquina_estado_saida()),
-            asyncio.create_task(self._monitorar_vagas()),
-            asyncio.create_task(self._tarefa_manutencao())
-        ]
-        
         logger.info("Servidor do Térreo iniciado")
         
         try:
-            # Aguarda todas as tarefas
-            await asyncio.gather(*self.tarefas)
+            # TaskGroup: encerramento estruturado — se uma máquina morrer,
+            # as demais são canceladas em vez de rodarem órfãs
+            async with asyncio.TaskGroup() as tg:
+                self.tarefas = [
+                    tg.create_task(self._maquina_estado_entrada()),
+                    tg.create_task(self._maquina_estado_saida()),
+                    tg.create_task(self._tarefa_periodica())
+                ]
         except KeyboardInterrupt:
             logger.info("Servidor interrompido pelo usuário")
         finally:
@@ -138,19 +188,15 @@ class ServidorTerreo:
         
         while True:
             try:
-                if self.estado_entrada == EstadoCancela.AGUARDANDO:
-                    await self._aguardar_veiculo_entrada()
-                
-                elif self.estado_entrada == EstadoCancela.DETECTOU_VEICULO:
-                    await self._processar_entrada()
-                
-                elif self.estado_entrada == EstadoCancela.ERRO:
-                    await self._recuperar_erro_entrada()
-                
-                await asyncio.sleep(1)  # Evita loop muito rápido
+                handler = self._dispatch_entrada.get(self.estado_entrada)
+                if handler is not None:
+                    await handler()
+                else:
+                    # Estado intermediário inesperado no topo do laço
+                    await asyncio.sleep(1)
                 
             except Exception as e:
-                logger.error(f"Erro na máquina de entrada: {e}")
+                logger.error("Erro na máquina de entrada: %s", e)
                 self.estado_entrada = EstadoCancela.ERRO
                 await asyncio.sleep(5)
     
@@ -160,33 +206,52 @@ class ServidorTerreo:
         
         while True:
             try:
-                if self.estado_saida == EstadoCancela.AGUARDANDO:
-                    await self._aguardar_veiculo_saida()
-                
-                elif self.estado_saida == EstadoCancela.DETECTOU_VEICULO:
-                    await self._processar_saida()
-                
-                elif self.estado_saida == EstadoCancela.ERRO:
-                    await self._recuperar_erro_saida()
-                
-                await asyncio.sleep(1)  # Evita loop muito rápido
+                handler = self._dispatch_saida.get(self.estado_saida)
+                if handler is not None:
+                    await handler()
+                else:
+                    # Estado intermediário inesperado no topo do laço
+                    await asyncio.sleep(1)
                 
             except Exception as e:
-                logger.error(f"Erro na máquina de saída: {e}")
+                logger.error("Erro na máquina de saída: %s", e)
                 self.estado_saida = EstadoCancela.ERRO
                 await asyncio.sleep(5)
     
+    def registrar_deteccao_entrada(self):
+        """Sinaliza detecção de veículo na entrada (callback do sensor)."""
+        self._entrada_evt.set()
+
+    def registrar_deteccao_saida(self):
+        """Sinaliza detecção de veículo na saída (callback do sensor)."""
+        self._saida_evt.set()
+
     async def _aguardar_veiculo_entrada(self):
-        """Aguarda veículo na entrada."""
-        if await self.cancela_entrada.detectar_presenca():
-            logger.info("Veículo detectado na entrada")
-            self.estado_entrada = EstadoCancela.DETECTOU_VEICULO
+        """Aguarda veículo na entrada.
+
+        Acorda imediatamente quando o sensor sinaliza via
+        registrar_deteccao_entrada; o timeout mantém um poll de reserva
+        para sensores que não fazem push.
+        """
+        try:
+            await asyncio.wait_for(self._entrada_evt.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            if not await self.cancela_entrada.detectar_presenca():
+                return
+        self._entrada_evt.clear()
+        logger.info("Veículo detectado na entrada")
+        self.estado_entrada = EstadoCancela.DETECTOU_VEICULO
     
     async def _aguardar_veiculo_saida(self):
-        """Aguarda veículo na saída."""
-        if await self.cancela_saida.detectar_presenca():
-            logger.info("Veículo detectado na saída")
-            self.estado_saida = EstadoCancela.DETECTOU_VEICULO
+        """Aguarda veículo na saída (mesmo esquema da entrada)."""
+        try:
+            await asyncio.wait_for(self._saida_evt.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            if not await self.cancela_saida.detectar_presenca():
+                return
+        self._saida_evt.clear()
+        logger.info("Veículo detectado na saída")
+        self.estado_saida = EstadoCancela.DETECTOU_VEICULO
     
     async def _processar_entrada(self):
         """Processa entrada de veículo."""
@@ -204,40 +269,42 @@ class ServidorTerreo:
             
             # Valida placa
             if not await self.lpr_service.validar_placa(placa):
-                logger.warning(f"Placa inválida na entrada: {placa}")
+                logger.warning("Placa inválida na entrada: %s", placa)
                 self.estado_entrada = EstadoCancela.ERRO
                 return
             
-            # Cria evento
-            evento = Evento(
-                placa=placa,
-                tipo=TipoEvento.ENTRADA,
-                timestamp=datetime.now(),
-                confianca_lpr=confianca,
-                andar="terreo"
-            )
+            # Monta o payload a partir do protótipo
+            dados = {
+                **self._tpl_entrada,
+                "placa": placa,
+                "timestamp": datetime.now(self._tz).isoformat(),
+                "confianca_lpr": confianca
+            }
             
             # Envia ao central
             self.estado_entrada = EstadoCancela.ENVIANDO_CENTRAL
-            resposta = await self._enviar_evento_central(evento)
+            resposta = await self._enviar_evento_central(dados)
             
             if resposta and resposta.get("sucesso"):
                 if resposta.get("acao") == "abrir_cancela":
                     # Abre cancela
                     self.estado_entrada = EstadoCancela.ABRINDO_CANCELA
                     if await self.cancela_entrada.ciclo_completo():
-                        logger.info(f"Entrada processada com sucesso: {placa}")
+                        logger.info("Entrada processada com sucesso: %s", placa)
                         
                         # Marca uma vaga como ocupada
                         vaga_livre = self.placar_service.encontrar_vaga_livre()
                         if vaga_livre != -1:
                             self.placar_service.ocupar_vaga(vaga_livre)
+                        # Cede o loop: o trecho acima é todo síncrono e, em
+                        # rajada de eventos, deixaria as outras tarefas sem vez
+                        await asyncio.sleep(0)
                     else:
                         logger.error("Falha no ciclo da cancela de entrada")
                         self.estado_entrada = EstadoCancela.ERRO
                         return
                 else:
-                    logger.warning(f"Entrada negada para {placa}: {resposta.get('mensagem')}")
+                    logger.warning("Entrada negada para %s: %s", placa, resposta.get('mensagem'))
             else:
                 logger.error("Resposta inválida do servidor central")
                 self.estado_entrada = EstadoCancela.ERRO
@@ -247,7 +314,7 @@ class ServidorTerreo:
             self.estado_entrada = EstadoCancela.AGUARDANDO
             
         except Exception as e:
-            logger.error(f"Erro ao processar entrada: {e}")
+            logger.error("Erro ao processar entrada: %s", e)
             self.estado_entrada = EstadoCancela.ERRO
     
     async def _processar_saida(self):
@@ -266,22 +333,21 @@ class ServidorTerreo:
             
             # Valida placa
             if not await self.lpr_service.validar_placa(placa):
-                logger.warning(f"Placa inválida na saída: {placa}")
+                logger.warning("Placa inválida na saída: %s", placa)
                 self.estado_saida = EstadoCancela.ERRO
                 return
             
-            # Cria evento
-            evento = Evento(
-                placa=placa,
-                tipo=TipoEvento.SAIDA,
-                timestamp=datetime.now(),
-                confianca_lpr=confianca,
-                andar="terreo"
-            )
+            # Monta o payload a partir do protótipo
+            dados = {
+                **self._tpl_saida,
+                "placa": placa,
+                "timestamp": datetime.now(self._tz).isoformat(),
+                "confianca_lpr": confianca
+            }
             
             # Envia ao central
             self.estado_saida = EstadoCancela.ENVIANDO_CENTRAL
-            resposta = await self._enviar_evento_central(evento)
+            resposta = await self._enviar_evento_central(dados)
             
             if resposta and resposta.get("sucesso"):
                 acao = resposta.get("acao")
@@ -289,24 +355,26 @@ class ServidorTerreo:
                     valor = resposta.get("valor", 0)
                     tempo = resposta.get("tempo_permanencia", 0)
                     
-                    logger.info(f"Cobrança para {placa}: R$ {valor:.2f} ({tempo} min)")
+                    logger.info("Cobrança para %s: R$ %.2f (%s min)", placa, valor, tempo)
                     
                     # Abre cancela
                     self.estado_saida = EstadoCancela.ABRINDO_CANCELA
                     if await self.cancela_saida.ciclo_completo():
-                        logger.info(f"Saída processada com sucesso: {placa}")
+                        logger.info("Saída processada com sucesso: %s", placa)
                         
-                        # Libera uma vaga (simplificação - seria baseada na vaga específica)
-                        for vaga in range(self.placar_service.total_vagas):
-                            if self.placar_service.vagas[vaga]:
-                                self.placar_service.liberar_vaga(vaga)
-                                break
+                        # Libera uma vaga (simplificação - seria baseada na
+                        # vaga específica); lookup O(1) na bitmask do placar
+                        vaga = self.placar_service.encontrar_vaga_ocupada()
+                        if vaga != -1:
+                            self.placar_service.liberar_vaga(vaga)
+                        # Cede o loop após o trecho síncrono (ver entrada)
+                        await asyncio.sleep(0)
                     else:
                         logger.error("Falha no ciclo da cancela de saída")
                         self.estado_saida = EstadoCancela.ERRO
                         return
                 else:
-                    logger.warning(f"Saída negada para {placa}: {resposta.get('mensagem')}")
+                    logger.warning("Saída negada para %s: %s", placa, resposta.get('mensagem'))
             else:
                 logger.error("Resposta inválida do servidor central para saída")
                 self.estado_saida = EstadoCancela.ERRO
@@ -316,69 +384,95 @@ class ServidorTerreo:
             self.estado_saida = EstadoCancela.AGUARDANDO
             
         except Exception as e:
-            logger.error(f"Erro ao processar saída: {e}")
+            logger.error("Erro ao processar saída: %s", e)
             self.estado_saida = EstadoCancela.ERRO
     
-    async def _enviar_evento_central(self, evento: Evento) -> Optional[dict]:
-        """Envia evento ao servidor central."""
-        try:
-            # Conecta ao servidor central
-            reader, writer = await asyncio.open_connection(
+    async def _garantir_conexao_central(self):
+        """Garante uma conexão aberta com o servidor central."""
+        if self._central_writer is None or self._central_writer.is_closing():
+            self._central_reader, self._central_writer = await asyncio.open_connection(
                 self.central_host,
                 self.central_port
             )
-            
-            # Envia evento
-            dados = evento.to_dict()
-            mensagem = json.dumps(dados) + '\n'
-            writer.write(mensagem.encode('utf-8'))
-            await writer.drain()
-            
-            # Recebe resposta
-            data = await reader.read(1024)
-            resposta_str = data.decode('utf-8').strip()
-            
-            # Fecha conexão
-            writer.close()
-            await writer.wait_closed()
-            
-            # Decodifica resposta
-            resposta = json.loads(resposta_str)
-            logger.debug(f"Resposta do central: {resposta}")
-            
-            return resposta
-            
-        except Exception as e:
-            logger.error(f"Erro ao comunicar com servidor central: {e}")
-            return None
+            # TCP_NODELAY: os eventos são mensagens pequenas e independentes;
+            # sem isso o algoritmo de Nagle pode segurar o envio por até 40ms
+            sock = self._central_writer.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            logger.info("Conectado ao servidor central")
+
+    def _descartar_conexao_central(self):
+        """Descarta a conexão atual (será reaberta na próxima tentativa)."""
+        if self._central_writer is not None:
+            self._central_writer.close()
+            self._central_writer = None
+            self._central_reader = None
+
+    async def _enviar_evento_central(self, dados: dict) -> Optional[dict]:
+        """Envia evento ao servidor central pela conexão persistente."""
+        mensagem = _json_dumps(dados) + b'\n'
+
+        async with self._central_lock:
+            # Uma retentativa: a conexão pode ter caído desde o último evento
+            for tentativa in range(2):
+                try:
+                    await self._garantir_conexao_central()
+
+                    # Envia evento
+                    self._central_writer.write(mensagem)
+                    await self._central_writer.drain()
+
+                    # Recebe resposta (enquadrada por '\n'; retorna assim
+                    # que a linha completa chega, com timeout para não
+                    # travar em um central morto)
+                    data = await asyncio.wait_for(
+                        self._central_reader.readline(), timeout=2.0
+                    )
+                    if not data:
+                        raise ConnectionError("conexão encerrada pelo central")
+
+                    # Decodifica resposta
+                    resposta = _json_loads(data)
+                    logger.debug("Resposta do central: %s", resposta)
+
+                    return resposta
+
+                except (ConnectionError, OSError, asyncio.TimeoutError) as e:
+                    self._descartar_conexao_central()
+                    if tentativa == 0:
+                        logger.warning("Reconectando ao central: %s", e)
+                        continue
+                    logger.error("Erro ao comunicar com servidor central: %s", e)
+                except Exception as e:
+                    logger.error("Erro ao comunicar com servidor central: %s", e)
+                    break
+
+        return None
     
-    async def _monitorar_vagas(self):
-        """Monitora estado das vagas."""
-        logger.info("Iniciando monitoramento de vagas")
+    async def _tarefa_periodica(self):
+        """Tick único de monitoramento de vagas e manutenção.
+
+        Um só timer no heap do loop: as vagas são verificadas a cada
+        tick e as estatísticas são emitidas a cada 60 ticks (5 minutos).
+        """
+        logger.info("Iniciando tarefa periódica (vagas + manutenção)")
+        tick = 0
         
         while True:
             try:
+                await asyncio.sleep(5)
+                tick += 1
+
                 await self.placar_service.atualizar_vagas()
-                await asyncio.sleep(5)  # Verifica a cada 5 segundos
-            except Exception as e:
-                logger.error(f"Erro no monitoramento de vagas: {e}")
-                await asyncio.sleep(10)
-    
-    async def _tarefa_manutencao(self):
-        """Tarefa de manutenção e limpeza."""
-        logger.info("Iniciando tarefa de manutenção")
-        
-        while True:
-            try:
+
                 # Log de estatísticas a cada 5 minutos
-                await asyncio.sleep(300)
-                
-                stats = self.obter_estatisticas()
-                logger.info(f"Estatísticas: {stats}")
+                if tick % 60 == 0:
+                    stats = self.obter_estatisticas()
+                    logger.info("Estatísticas: %s", stats)
                 
             except Exception as e:
-                logger.error(f"Erro na tarefa de manutenção: {e}")
-                await asyncio.sleep(60)
+                logger.error("Erro na tarefa periódica: %s", e)
+                await asyncio.sleep(10)
     
     async def _recuperar_erro_entrada(self):
         """Tenta recuperar de erros na entrada."""
@@ -400,16 +494,25 @@ class ServidorTerreo:
         for tarefa in self.tarefas:
             tarefa.cancel()
         
+        # Fecha a conexão com o central
+        self._descartar_conexao_central()
+
         # Desconecta MODBUS
         await self.modbus_client.desconectar()
         
         logger.info("Servidor do térreo parado")
+
+        # Drena e encerra a thread de logging (flush dos logs pendentes)
+        try:
+            _listener_logs.stop()
+        except RuntimeError:
+            pass  # listener já encerrado
     
     def obter_estatisticas(self) -> dict:
         """Retorna estatísticas do servidor."""
         return {
-            "estado_entrada": self.estado_entrada.value,
-            "estado_saida": self.estado_saida.value,
+            "estado_entrada": self.estado_entrada.name.lower(),
+            "estado_saida": self.estado_saida.name.lower(),
             "modo_simulacao": self.modo_simulacao,
             "modbus_conectado": self.modbus_client.conectado,
             "cancela_entrada": self.cancela_entrada.obter_status(),
@@ -427,8 +530,16 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Servidor interrompido pelo usuário")
     except Exception as e:
-        logger.error(f"Erro no servidor: {e}")
+        logger.error("Erro no servidor: %s", e)
 
 
 if __name__ == "__main__":
+    # uvloop (loop asyncio em libuv) quando disponível: acelera todas as
+    # tarefas, timers e conexões sem mudança de código
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
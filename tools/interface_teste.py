@@ -2,36 +2,69 @@
 Interface de teste para o sistema de estacionamento.
 """
 import asyncio
+import itertools
 import json
 import os
 import sys
 import time
+from collections import deque
 from datetime import datetime
 from typing import Dict, List
 
-# Adiciona o diretório raiz ao path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from tools.simulador import SimuladorEstacionamento
 
+# Importação condicional do numpy (agregações vetorizadas do histórico)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 
 class InterfaceTeste:
     """Interface de teste com menu interativo."""
     
-    def __init__(self):
+    def __init__(self, demo_delay: float = 1.0, pausa: float = 3.0):
         self.simulador = SimuladorEstacionamento()
-        self.historico: List[Dict] = []
+        # Pausas de demonstração configuráveis: com 0 (flag --fast) os
+        # fluxos viram um harness de regressão sem espera ociosa
+        self.demo_delay = demo_delay
+        self.pausa = pausa
+        if os.name == 'nt':
+            # Habilita o processamento de escapes VT no console do Windows
+            os.system('')
+        # Deque limitado: sessões longas de teste de carga não crescem a
+        # memória sem limite; só os últimos eventos interessam à exibição
+        self.historico: deque = deque(maxlen=1000)
+        self._eventos_total = 0
+        # Espelho colunar do histórico (SoA): agregações sobre valores e
+        # tempos rodam vetorizadas em vez de iterar dicts
+        if NUMPY_AVAILABLE:
+            self._h_capacidade = 1024
+            self._h_valor = np.zeros(self._h_capacidade, dtype=np.float32)
+            self._h_tempo = np.zeros(self._h_capacidade, dtype=np.int32)
+            self._h_sucesso = np.zeros(self._h_capacidade, dtype=np.bool_)
+            self._h_n = 0
     
+    async def _ainput(self, prompt: str) -> str:
+        """await self._ainput() sem bloquear o event loop (roda no executor padrão)."""
+        return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
+
     def limpar_tela(self):
-        """Limpa a tela do terminal."""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        """Limpa a tela do terminal via escape ANSI (sem fork de shell)."""
+        if not sys.stdout.isatty():
+            return
+        sys.stdout.write("\033[H\033[2J\033[3J")
+        sys.stdout.flush()
     
     def exibir_header(self):
         """Exibe cabeçalho da aplicação."""
         print("=" * 60)
         print("🚗 SISTEMA DE ESTACIONAMENTO - INTERFACE DE TESTE")
         print("=" * 60)
-        print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        # time.strftime direto no localtime: mais barato que construir
+        # um datetime só para formatar, e isto roda a cada redesenho
+        print(f"📅 {time.strftime('%d/%m/%Y %H:%M:%S')}")
         print()
     
     def exibir_status(self):
@@ -59,6 +92,19 @@ class InterfaceTeste:
     
     def registrar_evento(self, tipo: str, placa: str, resultado: Dict):
         """Registra evento no histórico."""
+        self._eventos_total += 1
+        if NUMPY_AVAILABLE:
+            if self._h_n == self._h_capacidade:
+                # Crescimento geométrico: amortiza as realocações
+                self._h_capacidade *= 2
+                self._h_valor = np.resize(self._h_valor, self._h_capacidade)
+                self._h_tempo = np.resize(self._h_tempo, self._h_capacidade)
+                self._h_sucesso = np.resize(self._h_sucesso, self._h_capacidade)
+            n = self._h_n
+            self._h_valor[n] = resultado.get("valor") or 0.0
+            self._h_tempo[n] = resultado.get("tempo_permanencia") or 0
+            self._h_sucesso[n] = bool(resultado.get("sucesso", False))
+            self._h_n = n + 1
         self.historico.append({
             "timestamp": datetime.now().isoformat(),
             "tipo": tipo,
@@ -69,12 +115,27 @@ class InterfaceTeste:
             "tempo": resultado.get("tempo_permanencia")
         })
     
+    def obter_resumo_historico(self) -> Dict:
+        """Resumo estatístico do histórico (agregado nas colunas numpy)."""
+        if not NUMPY_AVAILABLE or self._h_n == 0:
+            return {"eventos": self._eventos_total}
+        n = self._h_n
+        valores = self._h_valor[:n]
+        sucesso = self._h_sucesso[:n]
+        return {
+            "eventos": self._eventos_total,
+            "taxa_sucesso": float(sucesso.mean()),
+            "receita_total": float(valores.sum()),
+            "ticket_medio": float(valores[valores > 0].mean()) if (valores > 0).any() else 0.0,
+            "tempo_medio_min": float(self._h_tempo[:n][valores > 0].mean()) if (valores > 0).any() else 0.0
+        }
+
     async def simular_entrada_interativa(self):
         """Simula entrada com interface interativa."""
         print("🎯 SIMULAÇÃO DE ENTRADA")
         print("-" * 30)
         
-        placa = input("Digite a placa (ou ENTER para aleatória): ").strip().upper()
+        placa = (await self._ainput("Digite a placa (ou ENTER para aleatória): ")).strip().upper()
         if not placa:
             placa = None
         
@@ -91,7 +152,7 @@ class InterfaceTeste:
             print(f"❌ Entrada negada!")
             print(f"   📝 Motivo: {resultado.get('mensagem', 'Erro desconhecido')}")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def simular_saida_interativa(self):
         """Simula saída com interface interativa."""
@@ -101,14 +162,14 @@ class InterfaceTeste:
         status = self.simulador.obter_status()
         if not status['placas_estacionadas']:
             print("❌ Nenhum veículo estacionado!")
-            input("\nPressione ENTER para continuar...")
+            await self._ainput("\nPressione ENTER para continuar...")
             return
         
         print("🚗 Veículos estacionados:")
         for i, placa in enumerate(status['placas_estacionadas'], 1):
             print(f"   {i}. {placa}")
         
-        opcao = input("\nEscolha um veículo (número) ou digite uma placa: ").strip()
+        opcao = (await self._ainput("\nEscolha um veículo (número) ou digite uma placa: ")).strip()
         
         if opcao.isdigit():
             idx = int(opcao) - 1
@@ -116,7 +177,7 @@ class InterfaceTeste:
                 placa = status['placas_estacionadas'][idx]
             else:
                 print("❌ Opção inválida!")
-                input("\nPressione ENTER para continuar...")
+                await self._ainput("\nPressione ENTER para continuar...")
                 return
         else:
             placa = opcao.upper() if opcao else None
@@ -137,7 +198,7 @@ class InterfaceTeste:
             print(f"❌ Saída negada!")
             print(f"   📝 Motivo: {resultado.get('mensagem', 'Erro desconhecido')}")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def fluxo_completo_interativo(self):
         """Executa fluxo completo interativo."""
@@ -145,7 +206,7 @@ class InterfaceTeste:
         print("-" * 30)
         
         try:
-            num_str = input("Número de veículos (padrão 3): ").strip()
+            num_str = (await self._ainput("Número de veículos (padrão 3): ")).strip()
             num_veiculos = int(num_str) if num_str.isdigit() else 3
         except ValueError:
             num_veiculos = 3
@@ -153,17 +214,21 @@ class InterfaceTeste:
         print(f"🔄 Simulando {num_veiculos} veículos...")
         print("\n📥 ENTRADAS:")
         
-        # Simula entradas
-        for i in range(num_veiculos):
+        async def _entrada(indice: int):
             resultado = await self.simulador.simular_entrada()
             if resultado.get("sucesso"):
-                print(f"   ✅ Veículo {i+1}: Entrada autorizada")
+                print(f"   ✅ Veículo {indice}: Entrada autorizada")
             else:
-                print(f"   ❌ Veículo {i+1}: {resultado.get('mensagem', 'Erro')}")
-            await asyncio.sleep(1)
+                print(f"   ❌ Veículo {indice}: {resultado.get('mensagem', 'Erro')}")
+        
+        # Entradas disparadas em paralelo: independentes entre si, o
+        # tempo total cai de N round-trips para aproximadamente um
+        async with asyncio.TaskGroup() as tg:
+            for i in range(num_veiculos):
+                tg.create_task(_entrada(i + 1))
         
-        print(f"\n⏰ Aguardando 3 segundos...")
-        await asyncio.sleep(3)
+        print(f"\n⏰ Aguardando {self.pausa:.0f} segundos...")
+        await asyncio.sleep(self.pausa)
         
         # Simula algumas saídas
         status = self.simulador.obter_status()
@@ -178,13 +243,13 @@ class InterfaceTeste:
                     print(f"   ✅ Saída {i+1}: R$ {valor:.2f}")
                 else:
                     print(f"   ❌ Saída {i+1}: {resultado.get('mensagem', 'Erro')}")
-                await asyncio.sleep(1)
+                await asyncio.sleep(self.demo_delay)
         
         status_final = self.simulador.obter_status()
         print(f"\n📊 RESULTADO FINAL:")
         print(f"   🚗 Veículos restantes: {status_final['veiculos_estacionados']}")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def teste_carga_continua(self):
         """Executa teste de carga contínua."""
@@ -192,7 +257,7 @@ class InterfaceTeste:
         print("-" * 30)
         
         try:
-            intervalo_str = input("Intervalo entre eventos em segundos (padrão 5): ").strip()
+            intervalo_str = (await self._ainput("Intervalo entre eventos em segundos (padrão 5): ")).strip()
             intervalo = float(intervalo_str) if intervalo_str else 5.0
         except ValueError:
             intervalo = 5.0
@@ -207,29 +272,38 @@ class InterfaceTeste:
                 contador += 1
                 status = self.simulador.obter_status()
                 
+                # A saída da iteração é acumulada e emitida num único
+                # write(): menos syscalls em intervalos curtos e linhas
+                # atômicas mesmo com tarefas de fundo imprimindo
+                partes = []
+                
                 # Decide entre entrada ou saída
                 if status['veiculos_estacionados'] == 0 or (contador % 3 != 0):
-                    print(f"📥 Evento {contador}: Simulando entrada...")
+                    partes.append(f"📥 Evento {contador}: Simulando entrada...\n")
                     resultado = await self.simulador.simular_entrada()
                     tipo = "entrada"
                 else:
-                    print(f"📤 Evento {contador}: Simulando saída...")
+                    partes.append(f"📤 Evento {contador}: Simulando saída...\n")
                     resultado = await self.simulador.simular_saida()
                     tipo = "saída"
                 
                 if resultado.get("sucesso"):
                     if tipo == "saída":
                         valor = resultado.get("valor", 0)
-                        print(f"   ✅ {tipo.title()} autorizada - R$ {valor:.2f}")
+                        partes.append(f"   ✅ {tipo.title()} autorizada - R$ {valor:.2f}\n")
                     else:
-                        print(f"   ✅ {tipo.title()} autorizada")
+                        partes.append(f"   ✅ {tipo.title()} autorizada\n")
                 else:
-                    print(f"   ❌ {tipo.title()} negada: {resultado.get('mensagem', 'Erro')}")
+                    partes.append(f"   ❌ {tipo.title()} negada: {resultado.get('mensagem', 'Erro')}\n")
                 
                 # Mostra status a cada 5 eventos
                 if contador % 5 == 0:
                     status = self.simulador.obter_status()
-                    print(f"📊 Status: {status['veiculos_estacionados']} veículos estacionados")
+                    partes.append(f"📊 Status: {status['veiculos_estacionados']} veículos estacionados\n")
+                
+                sys.stdout.write("".join(partes))
+                if contador % 5 == 0:
+                    sys.stdout.flush()
                 
                 await asyncio.sleep(intervalo)
                 
@@ -238,23 +312,24 @@ class InterfaceTeste:
             status = self.simulador.obter_status()
             print(f"📊 Status final: {status['veiculos_estacionados']} veículos estacionados")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
-    def exibir_historico(self):
+    async def exibir_historico(self):
         """Exibe histórico de eventos."""
         print("🎯 HISTÓRICO DE EVENTOS")
         print("-" * 30)
         
         if not self.historico:
             print("📭 Nenhum evento registrado ainda.")
-            input("\nPressione ENTER para continuar...")
+            await self._ainput("\nPressione ENTER para continuar...")
             return
         
-        print(f"📊 Total de eventos: {len(self.historico)}")
+        print(f"📊 Total de eventos: {self._eventos_total}")
         print()
         
-        # Mostra últimos 10 eventos
-        eventos_recentes = self.historico[-10:]
+        # Mostra últimos 10 eventos (fatia do fim do deque sem copiá-lo)
+        inicio = max(0, len(self.historico) - 10)
+        eventos_recentes = list(itertools.islice(self.historico, inicio, len(self.historico)))
         
         for i, evento in enumerate(eventos_recentes, 1):
             timestamp = datetime.fromisoformat(evento['timestamp'])
@@ -272,10 +347,10 @@ class InterfaceTeste:
                 print(f"     📝 {evento['mensagem']}")
             print()
         
-        if len(self.historico) > 10:
-            print(f"... e mais {len(self.historico) - 10} eventos anteriores")
+        if self._eventos_total > 10:
+            print(f"... e mais {self._eventos_total - 10} eventos anteriores")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def demonstracao_automatica(self):
         """Executa uma demonstração automática."""
@@ -287,16 +362,17 @@ class InterfaceTeste:
         # Cenário 1: Entrada normal
         print("📥 Cenário 1: Entrada de veículo")
         resultado = await self.simulador.simular_entrada("ABC1234")
-        await asyncio.sleep(2)
+        await asyncio.sleep(self.demo_delay)
         
-        # Cenário 2: Mais entradas
+        # Cenário 2: entradas independentes disparadas em paralelo
         print("📥 Cenário 2: Múltiplas entradas")
-        for placa in ["DEF5678", "GHI9012"]:
-            await self.simulador.simular_entrada(placa)
-            await asyncio.sleep(1)
+        await asyncio.gather(
+            self.simulador.simular_entrada("DEF5678"),
+            self.simulador.simular_entrada("GHI9012")
+        )
         
         print("⏰ Aguardando permanência...")
-        await asyncio.sleep(3)
+        await asyncio.sleep(self.pausa)
         
         # Cenário 3: Saídas com cobrança
         print("📤 Cenário 3: Saídas com cobrança")
@@ -305,18 +381,18 @@ class InterfaceTeste:
             if resultado.get("sucesso"):
                 valor = resultado.get("valor", 0)
                 print(f"   💰 Valor cobrado: R$ {valor:.2f}")
-            await asyncio.sleep(2)
+            await asyncio.sleep(self.demo_delay)
         
         # Cenário 4: Tentativa de saída de veículo não estacionado
         print("📤 Cenário 4: Tentativa de saída inválida")
         await self.simulador.simular_saida("XYZ9999")
-        await asyncio.sleep(2)
+        await asyncio.sleep(self.demo_delay)
         
         print("✅ Demonstração concluída!")
         status = self.simulador.obter_status()
         print(f"📊 Status final: {status['veiculos_estacionados']} veículos estacionados")
         
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def teste_erro(self):
         """Testa cenários de erro."""
@@ -338,7 +414,7 @@ class InterfaceTeste:
         resultado = await self.simulador.simular_saida("INEXISTENTE")
         
         print("\n✅ Testes de erro concluídos!")
-        input("\nPressione ENTER para continuar...")
+        await self._ainput("\nPressione ENTER para continuar...")
     
     async def executar(self):
         """Executa a interface principal."""
@@ -349,7 +425,7 @@ class InterfaceTeste:
                 self.exibir_status()
                 self.exibir_menu()
                 
-                opcao = input("🎮 Escolha uma opção: ").strip()
+                opcao = (await self._ainput("🎮 Escolha uma opção: ")).strip()
                 print()
                 
                 if opcao == "1":
@@ -361,7 +437,7 @@ class InterfaceTeste:
                 elif opcao == "4":
                     await self.teste_carga_continua()
                 elif opcao == "5":
-                    self.exibir_historico()
+                    await self.exibir_historico()
                 elif opcao == "6":
                     await self.demonstracao_automatica()
                 elif opcao == "7":
@@ -378,7 +454,7 @@ class InterfaceTeste:
                 break
             except Exception as e:
                 print(f"❌ Erro na interface: {e}")
-                input("\nPressione ENTER para continuar...")
+                await self._ainput("\nPressione ENTER para continuar...")
 
 
 async def main():
@@ -386,12 +462,23 @@ async def main():
     print("🚀 Iniciando Interface de Teste...")
     print("⚠️  Certifique-se de que o Servidor Central esteja rodando!")
     
-    # Aguarda um pouco para o usuário ler
-    await asyncio.sleep(2)
+    # --fast zera as pausas de demonstração (uso como harness/CI)
+    rapido = "--fast" in sys.argv
+    if not rapido:
+        # Aguarda um pouco para o usuário ler
+        await asyncio.sleep(2)
     
-    interface = InterfaceTeste()
+    interface = InterfaceTeste(demo_delay=0.0, pausa=0.0) if rapido else InterfaceTeste()
     await interface.executar()
 
 
 if __name__ == "__main__":
+    # uvloop (loop asyncio em libuv) quando disponível: acelera o padrão
+    # de mensagens TCP curtas do simulador sem mudança de código
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())
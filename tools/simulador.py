@@ -5,16 +5,29 @@ import asyncio
 import json
 import logging
 import random
-import sys
-import os
+from collections import deque
 from datetime import datetime
 from typing import List, Dict
 
-# Adiciona o diretório raiz ao path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from src.core.models.evento import Evento, TipoEvento
 
+# Importação condicional do orjson (codec JSON em C para o caminho quente)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps  # retorna bytes direto
+
+    def _json_pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    def _json_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -29,12 +42,48 @@ class SimuladorEstacionamento:
             "ABC1234", "DEF5678", "GHI9012", "JKL3456", "MNO7890",
             "PQR1234", "STU5678", "VWX9012", "YZA3456", "BCD7890"
         ]
-        self.veiculos_estacionados: List[str] = []
+        # Dicionário ordenado por inserção: pertencimento e remoção em
+        # O(1), mantendo a ordem de chegada para exibição
+        self._estacionados: Dict[str, None] = {}
+        self._placas_set = frozenset(self.placas_teste)
+        # Cache do status: invalidado nas mutações, evita recopiar a
+        # lista de placas a cada redesenho da interface
+        self._status_cache: Dict = None
+        # Placas com requisição em voo: evita que envios concorrentes
+        # escolham a mesma placa antes de a resposta chegar
+        self._em_transito: set = set()
+        # Cache geracional da tupla de placas disponíveis: entradas em
+        # sequência sem mutação intermediária reutilizam a mesma tupla
+        self._gen = 0
+        self._disp_cache = (-1, ())
+
+        # Conexão persistente com o central: abrir/fechar um socket por
+        # evento domina o custo sob carga contínua (handshake a cada envio)
+        self._reader = None
+        self._writer = None
+
+        # Pipeline de envio: os eventos entram numa fila e um par de
+        # tarefas (escrita/leitura) mantém várias requisições em voo; as
+        # respostas chegam na ordem de envio, então um deque de futures
+        # basta para casar resposta com requisição
+        self._fila_envio: asyncio.Queue = None
+        self._pendentes: deque = deque()
+        self._tarefa_escrita = None
+        self._tarefa_leitura = None
     
     async def simular_entrada(self, placa: str = None) -> Dict:
         """Simula entrada de um veículo."""
         if not placa:
-            placa = random.choice([p for p in self.placas_teste if p not in self.veiculos_estacionados])
+            gen, disponiveis = self._disp_cache
+            if gen != self._gen:
+                disponiveis = tuple(
+                    self._placas_set - self._estacionados.keys() - self._em_transito
+                )
+                self._disp_cache = (self._gen, disponiveis)
+            if not disponiveis:
+                logger.warning("Nenhuma placa disponível para simular entrada")
+                return {"sucesso": False, "mensagem": "Nenhuma placa disponível"}
+            placa = random.choice(disponiveis)
         
         evento = Evento(
             placa=placa,
@@ -45,10 +94,18 @@ class SimuladorEstacionamento:
         )
         
         logger.info(f"Simulando entrada: {placa}")
-        resposta = await self._enviar_evento(evento)
+        self._em_transito.add(placa)
+        self._gen += 1
+        try:
+            resposta = await self._enviar_evento(evento)
+        finally:
+            self._em_transito.discard(placa)
+            self._gen += 1
         
         if resposta and resposta.get("sucesso"):
-            self.veiculos_estacionados.append(placa)
+            self._estacionados[placa] = None
+            self._status_cache = None
+            self._gen += 1
             logger.info(f"✅ Entrada autorizada: {placa}")
         else:
             logger.warning(f"❌ Entrada negada: {placa} - {resposta.get('mensagem', 'Erro')}")
@@ -58,12 +115,16 @@ class SimuladorEstacionamento:
     async def simular_saida(self, placa: str = None) -> Dict:
         """Simula saída de um veículo."""
         if not placa:
-            if not self.veiculos_estacionados:
+            if not self._estacionados:
                 logger.warning("Nenhum veículo estacionado para simular saída")
                 return {"sucesso": False, "mensagem": "Nenhum veículo estacionado"}
-            placa = random.choice(self.veiculos_estacionados)
+            candidatas = self._estacionados.keys() - self._em_transito
+            if not candidatas:
+                logger.warning("Nenhum veículo estacionado para simular saída")
+                return {"sucesso": False, "mensagem": "Nenhum veículo estacionado"}
+            placa = random.choice(tuple(candidatas))
         
-        if placa not in self.veiculos_estacionados:
+        if placa not in self._estacionados:
             logger.warning(f"Veículo {placa} não está estacionado")
             return {"sucesso": False, "mensagem": "Veículo não está estacionado"}
         
@@ -76,10 +137,18 @@ class SimuladorEstacionamento:
         )
         
         logger.info(f"Simulando saída: {placa}")
-        resposta = await self._enviar_evento(evento)
+        self._em_transito.add(placa)
+        self._gen += 1
+        try:
+            resposta = await self._enviar_evento(evento)
+        finally:
+            self._em_transito.discard(placa)
+            self._gen += 1
         
         if resposta and resposta.get("sucesso"):
-            self.veiculos_estacionados.remove(placa)
+            del self._estacionados[placa]
+            self._status_cache = None
+            self._gen += 1
             valor = resposta.get("valor", 0)
             tempo = resposta.get("tempo_permanencia", 0)
             logger.info(f"✅ Saída autorizada: {placa} - R$ {valor:.2f} ({tempo} min)")
@@ -88,61 +157,146 @@ class SimuladorEstacionamento:
         
         return resposta
     
-    async def _enviar_evento(self, evento: Evento) -> Dict:
-        """Envia evento ao servidor central."""
-        try:
-            reader, writer = await asyncio.open_connection(
+    async def _garantir_conexao(self):
+        """Garante uma conexão aberta e a tarefa de leitura das respostas."""
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(
                 self.central_host,
                 self.central_port
             )
-            
-            # Envia evento
-            dados = evento.to_dict()
-            mensagem = json.dumps(dados) + '\n'
-            writer.write(mensagem.encode('utf-8'))
-            await writer.drain()
-            
-            # Recebe resposta
-            data = await reader.read(1024)
-            resposta_str = data.decode('utf-8').strip()
-            
-            # Fecha conexão
+            self._tarefa_leitura = asyncio.create_task(
+                self._loop_leitura(self._reader)
+            )
+
+    def _descartar_conexao(self):
+        """Descarta a conexão atual (será reaberta no próximo envio)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+        self._falhar_pendentes(ConnectionError("Conexão com o central perdida"))
+
+    def _falhar_pendentes(self, erro: Exception):
+        """Resolve com erro as respostas ainda aguardadas."""
+        while self._pendentes:
+            fut = self._pendentes.popleft()
+            if not fut.done():
+                fut.set_exception(erro)
+
+    async def fechar(self):
+        """Encerra o pipeline e a conexão com o servidor central."""
+        for tarefa in (self._tarefa_escrita, self._tarefa_leitura):
+            if tarefa is not None:
+                tarefa.cancel()
+        self._tarefa_escrita = None
+        self._tarefa_leitura = None
+
+        if self._writer is not None:
+            writer = self._writer
+            self._writer = None
+            self._reader = None
             writer.close()
-            await writer.wait_closed()
-            
-            # Decodifica resposta
-            resposta = json.loads(resposta_str)
-            return resposta
-            
-        except Exception as e:
-            logger.error(f"Erro ao comunicar com servidor central: {e}")
-            return {"sucesso": False, "mensagem": str(e)}
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._falhar_pendentes(ConnectionError("Simulador encerrado"))
+
+    async def _loop_escrita(self):
+        """Consome a fila de envio escrevendo os eventos na conexão."""
+        while True:
+            mensagem, fut = await self._fila_envio.get()
+            try:
+                await self._garantir_conexao()
+                # Registra o future antes do write: a resposta pode chegar
+                # enquanto o drain ainda está em andamento
+                self._pendentes.append(fut)
+                self._writer.write(mensagem)
+                await self._writer.drain()
+            except (ConnectionError, OSError) as e:
+                if not fut.done():
+                    fut.set_exception(e)
+                self._descartar_conexao()
+
+    async def _loop_leitura(self, reader):
+        """Casa as respostas (em ordem de envio) com os futures pendentes."""
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    break
+                if self._pendentes:
+                    fut = self._pendentes.popleft()
+                    if not fut.done():
+                        fut.set_result(_json_loads(data))
+        except (ConnectionError, OSError):
+            pass
+        if reader is self._reader:
+            self._descartar_conexao()
+
+    async def _enviar_evento(self, evento: Evento) -> Dict:
+        """Envia evento ao servidor central pelo pipeline persistente.
+
+        O chamador só aguarda a própria resposta: envios concorrentes
+        seguem pela mesma conexão sem esperar o RTT uns dos outros.
+        """
+        if self._fila_envio is None:
+            self._fila_envio = asyncio.Queue()
+        if self._tarefa_escrita is None or self._tarefa_escrita.done():
+            self._tarefa_escrita = asyncio.create_task(self._loop_escrita())
+
+        # Payload inline: o servidor só consome estes campos, então o
+        # dicionário é montado direto dos atributos em vez de passar pelo
+        # to_dict completo (que serializa também os campos de resposta)
+        dados = {
+            "placa": evento.placa,
+            "tipo": evento.tipo.value,
+            "timestamp": evento.timestamp_iso,
+            "confianca_lpr": evento.confianca_lpr,
+            "andar": evento.andar
+        }
+        mensagem = _json_dumps(dados) + b'\n'
+
+        # Retry único cobre conexões derrubadas entre um envio e outro
+        for tentativa in range(2):
+            fut = asyncio.get_running_loop().create_future()
+            await self._fila_envio.put((mensagem, fut))
+            try:
+                return await fut
+            except (ConnectionError, OSError) as e:
+                if tentativa == 0:
+                    continue
+                logger.error(f"Erro ao comunicar com servidor central: {e}")
+                return {"sucesso": False, "mensagem": str(e)}
     
     async def simular_fluxo_completo(self, num_veiculos: int = 5):
         """Simula um fluxo completo de entradas e saídas."""
         logger.info(f"Iniciando simulação com {num_veiculos} veículos")
         
-        # Simula entradas
-        for i in range(num_veiculos):
-            await self.simular_entrada()
-            await asyncio.sleep(random.uniform(1, 3))
+        # Entradas concorrentes: os eventos são independentes e seguem
+        # pelo pipeline da mesma conexão, então N round-trips viram ~1
+        async with asyncio.TaskGroup() as tg:
+            for i in range(num_veiculos):
+                tg.create_task(self.simular_entrada())
+        await asyncio.sleep(random.uniform(1, 3))
         
-        logger.info(f"Veículos estacionados: {len(self.veiculos_estacionados)}")
+        logger.info(f"Veículos estacionados: {len(self._estacionados)}")
         
         # Aguarda um pouco
         await asyncio.sleep(5)
         
         # Simula algumas saídas
-        num_saidas = random.randint(1, len(self.veiculos_estacionados))
-        for i in range(num_saidas):
-            await self.simular_saida()
-            await asyncio.sleep(random.uniform(1, 3))
+        num_saidas = random.randint(1, len(self._estacionados))
+        async with asyncio.TaskGroup() as tg:
+            for i in range(num_saidas):
+                tg.create_task(self.simular_saida())
+        await asyncio.sleep(random.uniform(1, 3))
         
-        logger.info(f"Simulação concluída. Veículos restantes: {len(self.veiculos_estacionados)}")
+        logger.info(f"Simulação concluída. Veículos restantes: {len(self._estacionados)}")
         
         return {
-            "veiculos_restantes": len(self.veiculos_estacionados),
-            "placas_restantes": self.veiculos_estacionados.copy()
+            "veiculos_restantes": len(self._estacionados),
+            "placas_restantes": list(self._estacionados)
         }
     
     async def simular_carga_continua(self, intervalo: float = 10):
@@ -152,7 +306,7 @@ class SimuladorEstacionamento:
         while True:
             try:
                 # Decide aleatoriamente entre entrada ou saída
-                if len(self.veiculos_estacionados) == 0 or random.random() < 0.6:
+                if len(self._estacionados) == 0 or random.random() < 0.6:
                     # Prioriza entradas se não há veículos ou 60% de chance
                     await self.simular_entrada()
                 else:
@@ -169,12 +323,14 @@ class SimuladorEstacionamento:
                 await asyncio.sleep(5)
     
     def obter_status(self) -> Dict:
-        """Retorna status atual da simulação."""
-        return {
-            "veiculos_estacionados": len(self.veiculos_estacionados),
-            "placas_estacionadas": self.veiculos_estacionados.copy(),
-            "total_placas_teste": len(self.placas_teste)
-        }
+        """Retorna status atual da simulação (cacheado entre mutações)."""
+        if self._status_cache is None:
+            self._status_cache = {
+                "veiculos_estacionados": len(self._estacionados),
+                "placas_estacionadas": list(self._estacionados),
+                "total_placas_teste": len(self.placas_teste)
+            }
+        return self._status_cache
 
 
 async def main():
@@ -214,7 +370,7 @@ async def main():
             
             elif opcao == "5":
                 status = simulador.obter_status()
-                print(f"Status: {json.dumps(status, indent=2)}")
+                print(f"Status: {_json_pretty(status)}")
             
             elif opcao == "0":
                 print("Saindo...")
@@ -229,6 +385,16 @@ async def main():
         except Exception as e:
             print(f"Erro: {e}")
 
+    await simulador.fechar()
+
 
 if __name__ == "__main__":
+    # uvloop (loop asyncio em libuv) quando disponível: acelera o padrão
+    # de mensagens TCP curtas do simulador sem mudança de código
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(main())